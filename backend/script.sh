@@ -20,4 +20,8 @@ done
 >&2 echo 'PostgreSQL is available.'
 
 python manage.py migrate
-gunicorn core.wsgi:app --bind 0.0.0.0:5000 -k gevent
\ No newline at end of file
+python manage.py partitions
+# Каталог метрик очищается при каждом запуске, чтобы не суммировать значения воркеров прошлого запуска
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+gunicorn core.wsgi:app --config core/gunicorn.py --bind 0.0.0.0:5000 -k gevent
\ No newline at end of file
@@ -1,5 +1,6 @@
 from marshmallow import Schema, fields, validate
 
+from apps.pagination import CursorField
 from core.config import CONFIG
 
 
@@ -42,8 +43,14 @@ class SessionSchema(Schema):
 class PageSchema(Schema):
     """Схема для валидации страницы."""
 
-    page = fields.Integer(data_key='page_number', validate=[validate.Range(min=1)], load_only=True)
-    per_page = fields.Integer(data_key='page_size', validate=[validate.Range(max=100)], load_only=True)
+    per_page = fields.Integer(
+        data_key='page_size',
+        validate=[validate.Range(min=1, max=100)],
+        load_default=20,
+        load_only=True,
+    )
+    cursor = CursorField(load_only=True)
+    count = fields.Boolean(load_default=False, load_only=True)
 
 
 class OAuthSchema(Schema):
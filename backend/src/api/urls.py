@@ -1,5 +1,6 @@
-from api.v1.roles import RoleByNameView, RoleView, roles
+from api.v1.roles import RoleByNameView, RoleUsersView, RoleView, roles
 from api.v1.sessions import SessionByOAuth, SessionView, sessions
+from api.v1.tokens import IntrospectionView, JWKSView, tokens
 from api.v1.users import SubscribeView, UserView, users
 from apps.api import path
 
@@ -8,6 +9,9 @@ urlpatterns = [
     path('/sessions/<string:provider_name>', sessions, SessionByOAuth),
     path('/roles', roles, RoleView),
     path('/roles/<string:role_name>', roles, RoleByNameView),
+    path('/roles/<string:role_name>/users', roles, RoleUsersView),
     path('/users', users, UserView),
     path('/users/<uuid:user_pk>/subscribe', users, SubscribeView),
+    path('/tokens/introspect', tokens, IntrospectionView),
+    path('/.well-known/jwks.json', tokens, JWKSView, prefix=''),
 ]
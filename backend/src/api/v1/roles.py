@@ -1,17 +1,49 @@
 from http import HTTPStatus
-from typing import Dict, List, Tuple
+from typing import Dict, List, Set, Tuple
+from uuid import UUID
 
 from flask import Blueprint, make_response
 from flask_apispec import marshal_with, use_kwargs
 from flask_apispec.views import MethodResource
+from marshmallow import Schema, fields, validate
 from werkzeug import Response
 from werkzeug.exceptions import BadRequest, NotFound
 
-from api.schemas import RoleSchema
+from api.schemas import PageSchema, RoleSchema
+from apps.jwt import principal_cache
+from apps.catalog import role_etag
+from apps.pagination import paginator
+from apps.security import role_catalog
 from apps.security import user_datastore as postgres
-from core.decorators import admin_required
+from core.config import CONFIG
+from core.decorators import admin_required, conditional, read_replica
 
 roles = Blueprint('roles', __name__)
+ROLE_NOT_FOUND = 'Не удалось найти роль!'
+
+
+class RoleUsersSchema(Schema):
+    """Схема для валидации списка пользователей при массовом назначении роли."""
+
+    users = fields.List(
+        fields.UUID(),
+        required=True,
+        validate=[validate.Length(min=1, max=CONFIG.flask.bulk_max_size)],
+        load_only=True,
+    )
+
+
+class RoleUserResultSchema(Schema):
+    """Схема для выдачи результата назначения роли пользователю."""
+
+    user_pk = fields.UUID(dump_only=True)
+    status = fields.String(dump_only=True)
+
+
+class RoleUsersResultSchema(Schema):
+    """Схема для выдачи результатов массового назначения роли."""
+
+    users = fields.Nested(RoleUserResultSchema, many=True, dump_only=True)
 
 
 class RoleView(MethodResource):
@@ -37,21 +69,46 @@ class RoleView(MethodResource):
         postgres.commit()
         return make_response('', HTTPStatus.CREATED)
 
+    @conditional(
+        etag=lambda **kwargs: role_catalog.etag,
+        max_age=CONFIG.cache.http_max_age_sec,
+        public=True,
+        query=PageSchema,
+    )
+    @use_kwargs(PageSchema, location='query')
     @marshal_with(RoleSchema(many=True))
-    def get(self) -> Tuple[List, int]:
-        """Получение списка ролей.
+    @read_replica
+    def get(self, per_page: int, count: bool, **kwargs) -> Tuple[List, int, Dict]:
+        """Получение списка ролей, отсортированных по названию.
+
+        Выдача идет по курсору так же, как у истории входов.
+
+        Args:
+            per_page: Размер страницы
+            count: Нужно ли вернуть общее количество ролей в заголовке `X-Total-Count`
+            kwargs: Параметры в строке запроса
 
         Returns:
-            tuple[list, int]: Список ролей и код 200
+            tuple[list, int, dict]: Список ролей, код 200 и заголовки
         """
-        roles_list = postgres.role_model.query.all()
-        return roles_list, HTTPStatus.OK
+        roles_list = role_catalog.all()
+        page = paginator.paginate_sequence(roles_list, lambda role: (role.name,), kwargs.get('cursor'), per_page)
+        headers = page.headers
+        if count:
+            headers['X-Total-Count'] = str(len(roles_list))
+        return page.rows, HTTPStatus.OK, headers
 
 
 class RoleByNameView(MethodResource):
     """Класс для представления роли по названию."""
 
+    @conditional(
+        etag=lambda role_name: role_etag(role_catalog.get(role_name)),
+        max_age=CONFIG.cache.http_max_age_sec,
+        public=True,
+    )
     @marshal_with(RoleSchema)
+    @read_replica
     def get(self, role_name: str) -> Tuple[Dict, int]:
         """Получение роли по названию.
 
@@ -65,7 +122,7 @@ class RoleByNameView(MethodResource):
             tuple[dict, int]: Роль и код 200
         """
         if not (role := postgres.find_role(role_name)):
-            raise NotFound('Не удалось найти роль!')
+            raise NotFound(ROLE_NOT_FOUND)
         return role, HTTPStatus.OK
 
     @admin_required
@@ -73,6 +130,8 @@ class RoleByNameView(MethodResource):
     def put(self, role_name: str, **kwargs) -> Response:
         """Изменение роли по заданным параметрам.
 
+        Название роли записано в токенах, поэтому при его смене токены участников роли отзываются.
+
         Args:
             role_name: Название
             kwargs: Параметры в теле запросе
@@ -84,11 +143,14 @@ class RoleByNameView(MethodResource):
             Response: Ответ с кодом 200
         """
         if not (role := postgres.find_role(role_name)):
-            raise NotFound('Не удалось найти роль!')
+            raise NotFound(ROLE_NOT_FOUND)
+        renamed = kwargs.get('name', role.name) != role.name
         for field, value in kwargs.items():
             setattr(role, field, value)
         postgres.put(role)
+        members = postgres.revoke_role_tokens(role) if renamed else []
         postgres.commit()
+        principal_cache.invalidate(*members)
         return make_response('', HTTPStatus.OK)
 
     @admin_required
@@ -105,7 +167,83 @@ class RoleByNameView(MethodResource):
             Response: Ответ с кодом 204
         """
         if not (role := postgres.find_role(role_name)):
-            raise NotFound('Не удалось найти роль!')
+            raise NotFound(ROLE_NOT_FOUND)
+        members = postgres.revoke_role_tokens(role)
         postgres.delete(role)
         postgres.commit()
+        principal_cache.invalidate(*members)
         return make_response('', HTTPStatus.NO_CONTENT)
+
+
+def apply_role_change(users: List[UUID], existing: Set[UUID], changed: Set[UUID], status: str) -> Dict:
+    """Фиксация изменений ролей и формирование статуса по каждому пользователю.
+
+    Токены не отзываются, сбрасывается только кэш пользователей; роли в токенах обновятся при их обновлении.
+
+    Args:
+        users: ID пользователей из запроса
+        existing: ID найденных пользователей
+        changed: ID пользователей, у которых изменились роли
+        status: Статус для пользователей, у которых изменились роли
+
+    Returns:
+        dict: Статусы пользователей в порядке запроса
+    """
+    postgres.commit()
+    principal_cache.invalidate(*changed)
+    statuses = []
+    for user_pk in dict.fromkeys(users):
+        if user_pk in changed:
+            user_status = status
+        else:
+            user_status = 'unchanged' if user_pk in existing else 'not_found'
+        statuses.append({'user_pk': user_pk, 'status': user_status})
+    return {'users': statuses}
+
+
+class RoleUsersView(MethodResource):
+    """Класс для представления массового назначения роли пользователям."""
+
+    @admin_required
+    @use_kwargs(RoleUsersSchema)
+    @marshal_with(RoleUsersResultSchema)
+    def post(self, role_name: str, users: List[UUID]) -> Tuple[Dict, int]:
+        """Назначение роли списку пользователей.
+
+        Args:
+            role_name: Название
+            users: ID пользователей
+
+        Raises:
+            NotFound: Ошибка, что в базе данных нет такой роли
+
+        Returns:
+            tuple[dict, int]: Результат по каждому пользователю (`added`, `unchanged` или `not_found`) и код 200
+        """
+        if not (role := postgres.find_role(role_name)):
+            raise NotFound(ROLE_NOT_FOUND)
+        existing = postgres.find_existing_users(users)
+        changed = postgres.add_role_to_users(role, existing)
+        return apply_role_change(users, existing, changed, status='added'), HTTPStatus.OK
+
+    @admin_required
+    @use_kwargs(RoleUsersSchema)
+    @marshal_with(RoleUsersResultSchema)
+    def delete(self, role_name: str, users: List[UUID]) -> Tuple[Dict, int]:
+        """Отзыв роли у списка пользователей.
+
+        Args:
+            role_name: Название
+            users: ID пользователей
+
+        Raises:
+            NotFound: Ошибка, что в базе данных нет такой роли
+
+        Returns:
+            tuple[dict, int]: Результат по каждому пользователю (`removed`, `unchanged` или `not_found`) и код 200
+        """
+        if not (role := postgres.find_role(role_name)):
+            raise NotFound(ROLE_NOT_FOUND)
+        existing = postgres.find_existing_users(users)
+        changed = postgres.remove_role_from_users(role, existing)
+        return apply_role_change(users, existing, changed, status='removed'), HTTPStatus.OK
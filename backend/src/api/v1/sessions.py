@@ -5,17 +5,28 @@ from flask import Blueprint, current_app, make_response, request
 from flask_apispec import marshal_with, use_kwargs
 from flask_apispec.views import MethodResource
 from flask_jwt_extended import get_current_user, get_jwt, jwt_required
+from marshmallow import Schema, fields
 from werkzeug import Response
 from werkzeug.exceptions import BadRequest, Unauthorized
 
 from api import schemas
-from apps.jwt import generate_tokens
-from apps.jwt import jwt_redis_blocklist as redis
-from apps.oauth import OAuthSignIn
+from apps.jwt import generate_tokens, principal_cache, revoked_tokens
+from apps.limiter import rate_limiter
+from apps.oauth import OAuthProvider
+from apps.pagination import paginator
 from apps.security import user_datastore as postgres
 from core.config import CONFIG
+from core.decorators import read_replica
+from models.session import Session
 
 sessions = Blueprint('sessions', __name__)
+rate_limiter.limit(CONFIG.limiter.sessions)(sessions)
+
+
+class LogoutSchema(Schema):
+    """Схема для валидации выхода из аккаунта."""
+
+    everywhere = fields.Boolean(load_default=False, load_only=True)
 
 
 class SessionView(MethodResource):
@@ -44,18 +55,29 @@ class SessionView(MethodResource):
     @jwt_required()
     @use_kwargs(schemas.PageSchema, location='query')
     @marshal_with(schemas.SessionSchema(many=True))
-    def get(self, **kwargs) -> Tuple[List, int]:
+    @read_replica
+    def get(self, per_page: int, count: bool, **kwargs) -> Tuple[List, int, Dict]:
         """Получение пользователем своей истории входов в аккаунт.
 
+        Выдача идет по курсору: ссылки на соседние страницы возвращаются в заголовке `Link`,
+        а сами курсоры в заголовках `X-Next-Cursor` и `X-Prev-Cursor`.
+
         Args:
+            per_page: Размер страницы
+            count: Нужно ли вернуть общее количество входов в заголовке `X-Total-Count`
             kwargs: Параметры в строке запроса
 
         Returns:
-            tuple[list, int]: История входов в аккаунт и код 200
+            tuple[list, int, dict]: История входов в аккаунт, код 200 и заголовки
         """
-        user = get_current_user()
-        auth_history = user.sessions.paginate(error_out=False, **kwargs)
-        return auth_history.items, HTTPStatus.OK
+        query = postgres.find_sessions(get_current_user().pk)
+        page = paginator.paginate(
+            query, (Session.event_date, Session.pk), kwargs.get('cursor'), per_page, descending=True,
+        )
+        headers = page.headers
+        if count:
+            headers['X-Total-Count'] = str(query.count())
+        return page.rows, HTTPStatus.OK, headers
 
     @jwt_required(refresh=True)
     @marshal_with(schemas.TokenSchema)
@@ -69,14 +91,23 @@ class SessionView(MethodResource):
         return generate_tokens(user), HTTPStatus.OK
 
     @jwt_required()
-    def delete(self) -> Response:
+    @use_kwargs(LogoutSchema, location='query')
+    def delete(self, everywhere: bool) -> Response:
         """Выход пользователя из аккаунта.
 
+        Args:
+            everywhere: Нужно ли отозвать все токены пользователя, включая refresh-токены
+
         Returns:
             Response: Ответ с кодом 204
         """
-        revoked_token = get_jwt()['jti']
-        redis.set(revoked_token, value='', ex=CONFIG.flask.access_token_expires_by_sec)
+        if everywhere:
+            user_pk = get_current_user().pk
+            postgres.revoke_tokens(user_pk)
+            postgres.commit()
+            principal_cache.invalidate(user_pk)
+        else:
+            revoked_tokens.revoke(get_jwt()['jti'])
         return make_response('', HTTPStatus.NO_CONTENT)
 
 
@@ -95,10 +126,10 @@ class SessionByOAuth(MethodResource):
         Returns:
             Response: Ответ в виде аутентификации на сайте провайдера с кодом переадресации 302
         """
-        provider: Optional[OAuthSignIn] = current_app.config['OAUTH_PROVIDERS'].get(provider_name)
+        provider: Optional[OAuthProvider] = current_app.config['OAUTH_PROVIDERS'].get(provider_name)
         if not provider:
             raise BadRequest(f'Провайдер {provider_name} не поддерживается!')
-        if not (provider.service.client_id and provider.service.client_secret):
+        if not provider.configured:
             raise BadRequest(f'Технические проблемы при подключении к провайдеру {provider_name}!')
         return provider.authorize()
 
@@ -111,12 +142,19 @@ class SessionByOAuth(MethodResource):
             provider_name: Название провайдера OAuth
             kwargs: Параметры в строке запроса
 
+        Raises:
+            BadRequest: Ошибка, что провайдера нет в конфигурации
+            Unauthorized: Ошибка, что пользователь не найден
+
         Returns:
             tuple[dict, int]: Токены и код 201
         """
-        provider: OAuthSignIn = current_app.config['OAUTH_PROVIDERS'].get(provider_name)
+        provider: Optional[OAuthProvider] = current_app.config['OAUTH_PROVIDERS'].get(provider_name)
+        if not provider:
+            raise BadRequest(f'Провайдер {provider_name} не поддерживается!')
         social_id = provider.callback(**kwargs)
-        user = postgres.find_or_create_user(social_id, provider.service.name)
+        if not (user := postgres.find_or_create_user(social_id, provider.name)):
+            raise Unauthorized('Не удалось аутентифицировать пользователя!')
         postgres.create_session(user, request.user_agent)
         postgres.commit()
         return generate_tokens(user), HTTPStatus.CREATED
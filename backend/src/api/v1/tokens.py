@@ -0,0 +1,145 @@
+from http import HTTPStatus
+from typing import Dict, List, Optional, Set, Tuple
+
+from flask import Blueprint, current_app, request
+from flask_apispec import marshal_with, use_kwargs
+from flask_apispec.views import MethodResource
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from marshmallow import Schema, ValidationError, fields, validate, validates_schema
+from werkzeug import Response
+
+from apps.jwt import principal_cache, revoked_tokens
+from apps.keys import keyring
+from apps.limiter import rate_limiter
+from core.config import CONFIG
+
+tokens = Blueprint('tokens', __name__)
+
+
+class JWKSView(MethodResource):
+    """Класс для представления открытых ключей, которыми проверяется подпись токенов."""
+
+    def get(self) -> Response:
+        """Получение открытых ключей в формате JWKS.
+
+        Ответ кэшируется клиентами и прокси на время `jwks_max_age_sec` и перепроверяется по ETag.
+
+        Returns:
+            Response: Набор ключей с кодом 200 или код 304, если он не изменился
+        """
+        response = current_app.response_class(keyring.jwks, mimetype='application/json')
+        response.set_etag(keyring.etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = CONFIG.jwt.jwks_max_age_sec
+        return response.make_conditional(request)
+
+
+def decode_claims(token: str) -> Optional[dict]:
+    """Функция для декодирования токена с проверкой подписи и срока действия.
+
+    Args:
+        token: Токен
+
+    Returns:
+        Optional[dict]: Данные токена или None, если токен недействителен
+    """
+    try:
+        return decode_token(token)
+    except (PyJWTError, JWTExtendedException):
+        return None
+
+
+class IntrospectionSchema(Schema):
+    """Схема для валидации запроса на проверку одного или нескольких токенов."""
+
+    token = fields.String(load_only=True)
+    tokens = fields.List(
+        fields.String(),
+        validate=[validate.Length(min=1, max=CONFIG.jwt.introspection_batch)],
+        load_only=True,
+    )
+
+    @validates_schema
+    def validate_tokens(self, data: dict, **kwargs):
+        """Проверка, что передан токен или список токенов.
+
+        Args:
+            data: Данные запроса
+            kwargs: Необязательные именованные аргументы
+
+        Raises:
+            ValidationError: Ошибка, что токены не переданы
+        """
+        if not (data.get('token') or data.get('tokens')):
+            raise ValidationError('Нужно передать token или tokens')
+
+
+class TokenInfoSchema(Schema):
+    """Схема для выдачи информации о токене."""
+
+    active = fields.Boolean(dump_only=True)
+    type = fields.String(dump_only=True)
+    sub = fields.String(dump_only=True)
+    user_id = fields.String(dump_only=True)
+    roles = fields.List(fields.String, dump_only=True)
+    jti = fields.String(dump_only=True)
+    iat = fields.Integer(dump_only=True)
+    exp = fields.Integer(dump_only=True)
+
+
+class IntrospectionResultSchema(Schema):
+    """Схема для выдачи результата проверки токенов."""
+
+    tokens = fields.Nested(TokenInfoSchema, many=True, dump_only=True)
+
+
+class IntrospectionView(MethodResource):
+    """Класс для представления проверки токенов без обращения к базе данных.
+
+    Проверку вызывают другие сервисы на каждый свой запрос, поэтому для нее задан отдельный лимит вместо общего.
+    """
+
+    decorators = [rate_limiter.limit(CONFIG.limiter.introspection)]
+
+    @use_kwargs(IntrospectionSchema)
+    @marshal_with(IntrospectionResultSchema)
+    def post(self, token: str = '', tokens: Optional[List[str]] = None) -> Tuple[Dict, int]:
+        """Проверка одного или нескольких токенов.
+
+        Подпись и срок действия проверяются локально, а отзыв токенов и поколения токенов пользователей
+        проверяются одним запросом к Redis на каждое.
+
+        Args:
+            token: Токен
+            tokens: Список токенов, который проверяется вместо `token`
+
+        Returns:
+            tuple[dict, int]: Информация о токенах в порядке запроса и код 200
+        """
+        claims = [decode_claims(encoded) for encoded in tokens or [token]]
+        active = self.find_active([token_claims for token_claims in claims if token_claims])
+        token_infos = [
+            {**token_claims, 'active': True} if token_claims and token_claims['jti'] in active else {'active': False}
+            for token_claims in claims
+        ]
+        return {'tokens': token_infos}, HTTPStatus.OK
+
+    def find_active(self, valid_claims: List[dict]) -> Set[str]:
+        """Поиск действующих токенов среди токенов с верной подписью и сроком действия.
+
+        Args:
+            valid_claims: Данные токенов
+
+        Returns:
+            Set[str]: ID токенов, которые не отозваны и выпущены не раньше текущего поколения токенов пользователя
+        """
+        revoked = revoked_tokens.find_revoked(*(token_claims['jti'] for token_claims in valid_claims))
+        principals = principal_cache.get_many(*{token_claims['user_id'] for token_claims in valid_claims})
+        active = set()
+        for token_claims in valid_claims:
+            principal = principals.get(token_claims['user_id'])
+            if principal and token_claims.get('gen', 0) >= principal.token_generation:
+                active.add(token_claims['jti'])
+        return active - revoked
@@ -10,8 +10,9 @@ from werkzeug import Response
 from werkzeug.exceptions import BadRequest, NotFound, Unauthorized
 
 from api.schemas import ChangePasswordSchema, RoleSchema, UserSchema
+from apps.jwt import principal_cache
 from apps.security import user_datastore as postgres
-from core.decorators import admin_required
+from core.decorators import admin_required, conditional, read_replica
 from core.enums import AuthRoles
 from models.role import Role
 
@@ -50,6 +51,7 @@ class UserView(MethodResource):
         postgres.commit()
         return make_response('', HTTPStatus.CREATED)
 
+    @conditional()
     @jwt_required()
     @marshal_with(UserSchema)
     def get(self) -> Tuple[Dict, int]:
@@ -79,7 +81,9 @@ class UserView(MethodResource):
             raise Unauthorized('Не удалось аутентифицировать пользователя!')
         user.password = kwargs['new_password']
         postgres.put(user)
+        postgres.revoke_tokens(user.pk)
         postgres.commit()
+        principal_cache.invalidate(user.pk)
         return make_response('', HTTPStatus.OK)
 
 
@@ -111,11 +115,15 @@ class SubscribeView(MethodResource):
         if not (user := postgres.get_user(user_pk)):
             raise NotFound('Не удалось найти пользователя!')
         postgres.add_role_to_user(user, self.subscriber_role)
+        postgres.revoke_tokens(user.pk)
         postgres.commit()
+        principal_cache.invalidate(user.pk)
         return make_response('', HTTPStatus.CREATED)
 
+    @conditional()
     @admin_required
     @marshal_with(RoleSchema(many=True))
+    @read_replica
     def get(self, user_pk: UUID) -> Tuple[List, int]:
         """Получение ролей у пользователя.
 
@@ -148,5 +156,7 @@ class SubscribeView(MethodResource):
         if not (user := postgres.get_user(user_pk)):
             raise NotFound('Не удалось найти пользователя!')
         postgres.remove_role_from_user(user, self.subscriber_role)
+        postgres.revoke_tokens(user.pk)
         postgres.commit()
+        principal_cache.invalidate(user.pk)
         return make_response('', HTTPStatus.NO_CONTENT)
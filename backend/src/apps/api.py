@@ -11,6 +11,7 @@ from werkzeug.wrappers import Response
 
 from api.v1.roles import roles
 from api.v1.sessions import sessions
+from api.v1.tokens import tokens
 from api.v1.users import users
 from core.config import CONFIG
 
@@ -35,20 +36,24 @@ def handle_errors(error: exc.HTTPException) -> Tuple[Union[Any, Response], ...]:
     return jsonify({'message': error.description}), error.code
 
 
-def path(url: str, blueprint: Blueprint, view: MethodResource):
+def path(url: str, blueprint: Blueprint, view: MethodResource, prefix: str = CONFIG.flask.url_prefix):
     """Функция для регистрации URL-адреса.
 
     Args:
         url: URL-адрес
         blueprint: Объект `Blueprint`
         view: Класс представления
+        prefix: Префикс URL-адреса
     """
     blueprint.add_url_rule(
-        rule='{api_url}{path}'.format(api_url=CONFIG.flask.url_prefix, path=url),
+        rule='{api_url}{path}'.format(api_url=prefix, path=url),
         view_func=view.as_view(view.__name__.lower()),
         strict_slashes=False,
     )
-    for error in (exc.NotFound, exc.Unauthorized, exc.Forbidden, exc.BadRequest, exc.UnprocessableEntity):
+    errors = (
+        exc.NotFound, exc.Unauthorized, exc.Forbidden, exc.BadRequest, exc.UnprocessableEntity, exc.ServiceUnavailable,
+    )
+    for error in errors:
         blueprint.register_error_handler(error, handle_errors)  # type: ignore[arg-type]
     docs.register(view, blueprint=blueprint.name)
 
@@ -73,4 +78,5 @@ def install(app: Flask):
     app.register_blueprint(roles)
     app.register_blueprint(users)
     app.register_blueprint(sessions)
+    app.register_blueprint(tokens)
     docs.init_app(app)
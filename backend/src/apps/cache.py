@@ -0,0 +1,300 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Union
+from uuid import UUID
+
+from pydantic import BaseModel
+from redis import Redis
+from sqlalchemy.orm import selectinload
+
+from apps.db import db
+from models.user import User
+
+
+class RolePrincipal(BaseModel):
+    """Схема роли в составе закэшированного пользователя."""
+
+    name: str
+
+    def __str__(self) -> str:
+        """
+        Представление роли в виде названия, как у модели `Role`.
+
+        Returns:
+            str: Название роли
+        """
+        return self.name.title()
+
+
+class UserPrincipal(BaseModel):
+    """Схема пользователя, достаточная для обработки авторизованных запросов без обращения к базе данных."""
+
+    pk: UUID
+    email: str
+    roles: List[RolePrincipal]
+    token_generation: int = 0
+
+    @classmethod
+    def from_user(cls, user: User) -> 'UserPrincipal':
+        """Создает схему по модели пользователя.
+
+        Args:
+            user: Пользователь
+
+        Returns:
+            UserPrincipal: Закэшированное представление пользователя
+        """
+        return cls(
+            pk=user.pk,
+            email=user.email,
+            roles=[RolePrincipal(name=role.name) for role in user.roles],
+            token_generation=user.token_generation or 0,
+        )
+
+
+class LocalCache:
+    """Потокобезопасный LRU-кэш в памяти процесса с ограничением времени жизни записей."""
+
+    def __init__(self, max_size: int, ttl: float):
+        """При инициализации задается размер кэша и время жизни записей.
+
+        Args:
+            max_size: Максимальное количество записей
+            ttl: Время жизни записи в секундах
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Получение записи из кэша.
+
+        Args:
+            key: Ключ
+
+        Returns:
+            Optional[Any]: Значение или None, если записи нет или она устарела
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._data.pop(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def get_many(self, *keys: Hashable) -> Dict[Any, Any]:
+        """Получение нескольких записей из кэша.
+
+        Args:
+            keys: Ключи
+
+        Returns:
+            Dict[Any, Any]: Значения по ключам, кроме отсутствующих и устаревших
+        """
+        found = {key: self.get(key) for key in keys}
+        return {key: value for key, value in found.items() if value is not None}
+
+    def set(self, key: Hashable, value: Any):
+        """Добавление записи в кэш с вытеснением давно не использованных записей.
+
+        Args:
+            key: Ключ
+            value: Значение
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys: Hashable):
+        """Удаление записей из кэша.
+
+        Args:
+            keys: Ключи
+        """
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        """Очистка кэша."""
+        with self._lock:
+            self._data.clear()
+
+
+class PrincipalCache:
+    """Двухуровневый кэш пользователей: LRU в памяти процесса перед общим кэшем в Redis.
+
+    Локальный уровень живет недолго, так как сбрасывается только в том процессе, где пользователь был изменен.
+    В памяти процесса пользователи хранятся по ID, а в Redis по ключу с префиксом.
+    """
+
+    key_prefix = 'principal'
+
+    def __init__(self, redis: Redis, max_size: int, local_ttl: float, ttl: int):
+        """При инициализации задается клиент Redis и параметры кэша.
+
+        Args:
+            redis: Клиент Redis
+            max_size: Максимальное количество пользователей в памяти процесса
+            local_ttl: Время жизни записи в памяти процесса в секундах
+            ttl: Время жизни записи в Redis в секундах
+        """
+        self.redis = redis
+        self.ttl = ttl
+        self.local = LocalCache(max_size=max_size, ttl=local_ttl)
+
+    def key(self, user_pk: Union[UUID, str]) -> str:
+        """Ключ пользователя в Redis.
+
+        Args:
+            user_pk: ID пользователя
+
+        Returns:
+            str: Ключ
+        """
+        return '{prefix}:{user_pk}'.format(prefix=self.key_prefix, user_pk=user_pk)
+
+    def get(self, user_pk: Union[UUID, str]) -> Optional[UserPrincipal]:
+        """Получение пользователя из кэша, а при его отсутствии из базы данных.
+
+        Args:
+            user_pk: ID пользователя
+
+        Returns:
+            Optional[UserPrincipal]: Пользователь или None, если его нет в базе данных
+        """
+        return self.get_many(user_pk).get(str(user_pk))
+
+    def get_many(self, *user_pks: Union[UUID, str]) -> Dict[str, UserPrincipal]:
+        """Получение нескольких пользователей одним запросом к Redis и не более чем одним запросом к базе данных.
+
+        Args:
+            user_pks: ID пользователей
+
+        Returns:
+            Dict[str, UserPrincipal]: Пользователи по ID, кроме отсутствующих в базе данных
+        """
+        keys = {str(user_pk): self.key(user_pk) for user_pk in user_pks}
+        principals: Dict[str, UserPrincipal] = self.local.get_many(*keys)
+        for load in (self._load_cached, self._load_stored):
+            missing = {user_pk: keys[user_pk] for user_pk in keys.keys() - principals.keys()}
+            if missing:
+                principals.update(load(missing))
+        return principals
+
+    def invalidate(self, *user_pks: Union[UUID, str]):
+        """Сброс кэша у измененных пользователей.
+
+        Args:
+            user_pks: ID пользователей
+        """
+        if not user_pks:
+            return
+        self.local.delete(*(str(user_pk) for user_pk in user_pks))
+        self.redis.delete(*(self.key(user_pk) for user_pk in user_pks))
+
+    def _load_cached(self, keys: Dict[str, str]) -> Dict[str, UserPrincipal]:
+        cached = dict(zip(keys, self.redis.mget(list(keys.values()))))
+        principals = {user_pk: UserPrincipal.parse_raw(raw) for user_pk, raw in cached.items() if raw}
+        for user_pk, principal in principals.items():
+            self.local.set(user_pk, principal)
+        return principals
+
+    def _load_stored(self, keys: Dict[str, str]) -> Dict[str, UserPrincipal]:
+        query = (
+            db.session.query(User)
+            .options(selectinload(User.roles))
+            .filter(User.pk.in_([UUID(user_pk) for user_pk in keys]))
+        )
+        principals = {str(user.pk): UserPrincipal.from_user(user) for user in query}
+        pipeline = self.redis.pipeline(transaction=False)
+        for user_pk, principal in principals.items():
+            pipeline.set(keys[user_pk], principal.json(), ex=self.ttl)
+            self.local.set(user_pk, principal)
+        pipeline.execute()
+        return principals
+
+
+class SocialAccountCache:
+    """Двухуровневый кэш ID пользователей по их аккаунтам в социальных сервисах.
+
+    Соответствие не меняется, пока пользователь существует, поэтому хранится долго.
+    """
+
+    key_prefix = 'social'
+
+    def __init__(self, redis: Redis, max_size: int, ttl: int):
+        """При инициализации задается клиент Redis и параметры кэша.
+
+        Args:
+            redis: Клиент Redis
+            max_size: Максимальное количество аккаунтов в памяти процесса
+            ttl: Время жизни записи в секундах
+        """
+        self.redis = redis
+        self.ttl = ttl
+        self.local = LocalCache(max_size=max_size, ttl=ttl)
+
+    def key(self, social_name: str, social_id: str) -> str:
+        """Ключ аккаунта в Redis.
+
+        Args:
+            social_name: Название социального сервиса
+            social_id: ID пользователя в социальном сервисе
+
+        Returns:
+            str: Ключ
+        """
+        return '{prefix}:{name}:{id}'.format(prefix=self.key_prefix, name=social_name, id=social_id)
+
+    def get(self, social_name: str, social_id: str) -> Optional[UUID]:
+        """Получение ID пользователя по аккаунту.
+
+        Args:
+            social_name: Название социального сервиса
+            social_id: ID пользователя в социальном сервисе
+
+        Returns:
+            Optional[UUID]: ID пользователя или None, если аккаунта нет в кэше
+        """
+        key = self.key(social_name, social_id)
+        user_pk = self.local.get(key)
+        if user_pk is not None:
+            return user_pk
+        cached = self.redis.get(key)
+        if not cached:
+            return None
+        user_pk = UUID(cached.decode('utf-8'))
+        self.local.set(key, user_pk)
+        return user_pk
+
+    def set(self, social_name: str, social_id: str, user_pk: UUID):
+        """Сохранение ID пользователя по аккаунту.
+
+        Args:
+            social_name: Название социального сервиса
+            social_id: ID пользователя в социальном сервисе
+            user_pk: ID пользователя
+        """
+        key = self.key(social_name, social_id)
+        self.redis.set(key, str(user_pk), ex=self.ttl)
+        self.local.set(key, user_pk)
+
+    def delete(self, social_name: str, social_id: str):
+        """Удаление аккаунта из кэша.
+
+        Args:
+            social_name: Название социального сервиса
+            social_id: ID пользователя в социальном сервисе
+        """
+        key = self.key(social_name, social_id)
+        self.local.delete(key)
+        self.redis.delete(key)
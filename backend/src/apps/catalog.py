@@ -0,0 +1,178 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+from uuid import UUID
+
+from redis import Redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from apps.db import db
+from models.role import Role
+
+
+def detached_role(pk: UUID, name: str, description: Optional[str]) -> Role:
+    """Функция для создания роли, не привязанной к сессии базы данных.
+
+    Args:
+        pk: ID роли
+        name: Название
+        description: Описание
+
+    Returns:
+        Role: Роль, которую можно добавить в сессию без запроса к базе данных
+    """
+    role = Role(pk=pk, name=name, description=description)
+    make_transient_to_detached(role)
+    return role
+
+
+def fingerprint(roles: Sequence[Any]) -> str:
+    """Функция для вычисления хэша содержимого ролей.
+
+    Args:
+        roles: Роли или строки запроса с полями `pk`, `name` и `description`
+
+    Returns:
+        str: Хэш ролей
+    """
+    serialized = json.dumps([[str(role.pk), role.name, role.description] for role in roles])
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()[:32]
+
+
+def role_etag(role: Optional[Role]) -> Optional[str]:
+    """Функция для получения ETag отдельной роли.
+
+    Args:
+        role: Роль
+
+    Returns:
+        Optional[str]: Хэш роли или None, если роли нет
+    """
+    return fingerprint([role]) if role else None
+
+
+def load_roles() -> Tuple[Dict[str, Role], str]:
+    """Функция для чтения всех ролей из базы данных.
+
+    Returns:
+        Tuple[Dict[str, Role], str]: Роли по названиям в порядке сортировки и хэш их содержимого
+    """
+    rows = sorted(db.session.query(Role.pk, Role.name, Role.description), key=lambda row: row.name)
+    return {row.name: detached_role(*row) for row in rows}, fingerprint(rows)
+
+
+class RoleCatalog:
+    """Справочник ролей в памяти процесса.
+
+    Роли хранятся в виде объектов, не привязанных к сессии базы данных, и перечитываются целиком,
+    когда меняется их версия в Redis. Версия сверяется не чаще, чем раз в `check_interval` секунд
+    и увеличивается после каждой транзакции, в которой роли были созданы, изменены или удалены.
+    """
+
+    version_key = 'roles:version'
+
+    def __init__(self, redis: Redis, check_interval: float):
+        """При инициализации задается клиент Redis и период проверки версии.
+
+        Args:
+            redis: Клиент Redis
+            check_interval: Период проверки версии в секундах
+        """
+        self.redis = redis
+        self.check_interval = check_interval
+        self._roles: Dict[str, Role] = {}
+        self._version: Optional[int] = None
+        self._etag = ''
+        self._checked_at: float = 0
+        self._lock = threading.Lock()
+
+    def all(self) -> List[Role]:
+        """Получение всех ролей.
+
+        Returns:
+            List[Role]: Роли, не привязанные к сессии базы данных
+        """
+        self._refresh()
+        return list(self._roles.values())
+
+    def get(self, name: str) -> Optional[Role]:
+        """Получение роли по названию.
+
+        Args:
+            name: Название
+
+        Returns:
+            Optional[Role]: Роль, не привязанная к сессии базы данных, или None, если ее нет в справочнике
+        """
+        self._refresh()
+        return self._roles.get(name)
+
+    @property
+    def etag(self) -> str:
+        """Хэш содержимого справочника для условных запросов.
+
+        Returns:
+            str: Хэш ролей
+        """
+        self._refresh()
+        return self._etag
+
+    def bump(self):
+        """Увеличение версии справочника после изменения ролей, чтобы его перечитали все процессы."""
+        self.redis.incr(self.version_key)
+        self.clear()
+
+    def clear(self):
+        """Сброс справочника в текущем процессе."""
+        with self._lock:
+            self._version = None
+
+    def _refresh(self):
+        if self._version is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return
+        version = int(self.redis.get(self.version_key) or 0)
+        if version != self._version:
+            roles, etag = load_roles()
+            with self._lock:
+                self._roles = roles
+                self._version = version
+                self._etag = etag
+        self._checked_at = time.monotonic()
+
+
+class RoleChangeTracker:
+    """Класс, который увеличивает версию справочника ролей после транзакций, изменивших роли."""
+
+    def __init__(self, catalog: RoleCatalog):
+        """При инициализации задается справочник ролей.
+
+        Args:
+            catalog: Справочник ролей
+        """
+        self.catalog = catalog
+
+    def watch(self, session_class: Type[Session]):
+        """Подписка на изменения ролей в сессиях базы данных.
+
+        Args:
+            session_class: Класс сессий базы данных
+        """
+        for identifier in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(Role, identifier, self._on_role_changed)
+        event.listen(session_class, 'after_commit', self._on_commit)
+        event.listen(session_class, 'after_soft_rollback', self._on_rollback)
+
+    def _on_role_changed(self, mapper, connection, target: Role):
+        session = object_session(target)
+        if session is not None:
+            session.info[self.catalog.version_key] = True
+
+    def _on_commit(self, session: Session):
+        if session.info.pop(self.catalog.version_key, False):
+            self.catalog.bump()
+
+    def _on_rollback(self, session: Session, previous_transaction):
+        session.info.pop(self.catalog.version_key, None)
@@ -1,26 +1,87 @@
-from flask import Flask
+from flask import Flask, g, has_app_context
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy.pool import QueuePool
 
+from apps.metrics import pool_checkout_latency
 from core.config import CONFIG
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """Сессия, которая направляет запросы представлений только для чтения на реплику."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        """Выбор подключения для запроса.
+
+        Args:
+            mapper: Модель
+            clause: Выражение запроса
+            bind: Явно заданное подключение
+            kwargs: Необязательные именованные аргументы
+
+        Returns:
+            Engine: Подключение к реплике, если она выбрана для запроса, иначе к основной базе данных
+        """
+        if bind is None and not self._flushing and has_app_context() and g.get('read_replica'):
+            return db.engines[g.read_replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class TimedQueuePool(QueuePool):
+    """Пул соединений, который учитывает время ожидания свободного соединения."""
+
+    def _do_get(self):
+        with pool_checkout_latency.time():
+            return super()._do_get()
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
 
+def postgres_uri(host: str) -> str:
+    """Функция для получения адреса подключения к PostgreSQL.
+
+    Args:
+        host: Хост, в том числе с портом через двоеточие
+
+    Returns:
+        str: Адрес подключения
+    """
+    host, _, port = host.partition(':')
+    return 'postgresql://{user}:{password}@{host}:{port}/{db}'.format(
+        user=CONFIG.postgres.user,
+        password=CONFIG.postgres.password,
+        host=host,
+        port=port or CONFIG.postgres.port,
+        db=CONFIG.postgres.db,
+    )
+
+
 def install(app: Flask):
     """Установка компонента Flask для работы с базой данных PostgreSQL.
 
     Args:
         app: Flask
     """
-    app.config['SQLALCHEMY_DATABASE_URI'] = (
-        'postgresql://{user}:{password}@{host}:{port}/{db}'.format(
-            user=CONFIG.postgres.user,
-            password=CONFIG.postgres.password,
-            host=CONFIG.postgres.host,
-            port=CONFIG.postgres.port,
-            db=CONFIG.postgres.db,
-        ))
+    if CONFIG.postgres.dsn:
+        # Явный адрес подключения используется для запуска на других СУБД, например в бенчмарках на SQLite
+        app.config['SQLALCHEMY_DATABASE_URI'] = CONFIG.postgres.dsn
+    else:
+        app.config['SQLALCHEMY_DATABASE_URI'] = postgres_uri(CONFIG.postgres.host)
+        app.config['SQLALCHEMY_BINDS'] = {
+            f'replica_{index}': postgres_uri(host) for index, host in enumerate(CONFIG.postgres.replicas)
+        }
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'poolclass': TimedQueuePool,
+            'pool_size': CONFIG.postgres.pool_size,
+            'max_overflow': CONFIG.postgres.max_overflow,
+            'pool_timeout': CONFIG.postgres.pool_timeout_sec,
+            'pool_recycle': CONFIG.postgres.pool_recycle_sec,
+            'pool_pre_ping': CONFIG.postgres.pool_pre_ping,
+            'connect_args': {'options': f'-c statement_timeout={CONFIG.postgres.statement_timeout_ms}'},
+        }
+    app.config['SQLALCHEMY_REPLICAS'] = list(app.config.get('SQLALCHEMY_BINDS', {}))
     db.init_app(app)
     migrate.init_app(app, db)
@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from flask import current_app
+from flask_security.utils import hash_password, verify_password
+from gevent import monkey, threadpool
+
+from apps.metrics import password_hash_in_flight, password_hash_latency, password_hash_queued
+from core.config import CONFIG
+
+
+class PasswordHasher:
+    """Класс для хэширования и проверки паролей в пуле потоков ОС.
+
+    Вычисление bcrypt занимает десятки миллисекунд, и под gevent оно блокировало бы весь цикл событий воркера.
+    Если модуль `threading` пропатчен gevent, используется пул настоящих потоков из gevent,
+    ожидание результата в котором не блокирует остальные гринлеты. Количество задач в пуле и в очереди к нему
+    выгружается в метрики Prometheus.
+    """
+
+    def __init__(self, workers: int):
+        """При инициализации задается количество потоков в пуле.
+
+        Args:
+            workers: Количество потоков
+        """
+        self.workers = workers
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        """Пул потоков, который создается при первом обращении уже в процессе воркера.
+
+        Returns:
+            Executor: Пул потоков
+        """
+        if self._executor is None:
+            if monkey.is_module_patched('threading'):
+                self._executor = threadpool.ThreadPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='password-hasher',
+                )
+        return self._executor
+
+    def hash(self, password: str) -> str:
+        """Хэширование пароля.
+
+        Args:
+            password: Пароль
+
+        Returns:
+            str: Пароль в виде хэша
+        """
+        return self._run('hash', hash_password, password)
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        """Проверка пароля.
+
+        Args:
+            password: Пароль
+            password_hash: Хэш пароля
+
+        Returns:
+            bool: Совпадает ли пароль с хэшем
+        """
+        return self._run('verify', verify_password, password, password_hash)
+
+    def _run(self, operation: str, func: Callable, *args) -> Any:
+        app = current_app._get_current_object()  # type: ignore[attr-defined]
+
+        def task():
+            with app.app_context(), password_hash_latency.labels(operation).time():
+                return func(*args)
+
+        with self._lock:
+            self.in_flight += 1
+            self._publish()
+        future = self.executor.submit(task)
+        future.add_done_callback(self._finished)
+        return future.result()
+
+    def _finished(self, future: Future):
+        with self._lock:
+            self.in_flight -= 1
+            self._publish()
+
+    def _publish(self):
+        password_hash_in_flight.set(self.in_flight)
+        password_hash_queued.set(max(0, self.in_flight - self.workers))
+
+
+password_hasher = PasswordHasher(workers=CONFIG.hashing.workers)
@@ -0,0 +1,155 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from flask import Flask
+
+from apps.db import db
+from core.config import CONFIG
+from models.session import Session
+
+logger = logging.getLogger(__name__)
+
+
+def insert_sessions(batch: List[dict]):
+    """Функция для записи сессий одним многострочным `INSERT`.
+
+    Args:
+        batch: Сессии в виде словарей со значениями столбцов
+    """
+    with db.engine.begin() as connection:
+        connection.execute(Session.__table__.insert(), batch)
+
+
+def write_sessions(app: Flask, batch: List[dict], retries: int = 1):
+    """Функция для записи пачки сессий с повторами.
+
+    Пачка записывается повторно с растущей паузой, а если все попытки не удались, то по одной сессии,
+    чтобы из-за ошибочной строки не потерять остальные. В лог попадают только сессии, которые так и не записались.
+    Ошибка записи не прерывает фоновый поток.
+
+    Args:
+        app: Flask
+        batch: Сессии в виде словарей со значениями столбцов
+        retries: Количество попыток записать пачку целиком
+    """
+    with app.app_context():
+        for attempt in range(retries):
+            try:
+                insert_sessions(batch)
+            except Exception:
+                logger.warning('Не удалось записать историю входов, попытка %d из %d', attempt + 1, retries)
+                time.sleep(0.1 * 2 ** attempt)
+            else:
+                return
+        for row in batch:
+            try:
+                insert_sessions([row])
+            except Exception:
+                logger.exception('Не удалось записать сессию %s', row['pk'])
+
+
+class SessionWriter:
+    """Класс для отложенной записи истории входов пачками.
+
+    Сессии складываются в очередь в памяти процесса, а фоновый поток записывает их одним многострочным `INSERT`,
+    когда набирается пачка или истекает интервал. При завершении процесса очередь дописывается в базу данных.
+    Если очередь переполнена, сессия не ставится в нее и записывается сразу в текущем запросе.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, queue_size: int, retries: int):
+        """При инициализации задаются условия записи пачки, размер очереди и количество попыток записи.
+
+        Args:
+            batch_size: Максимальный размер пачки
+            flush_interval: Максимальное время ожидания пачки в секундах
+            queue_size: Максимальный размер очереди
+            retries: Количество попыток записать пачку целиком
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._app: Optional[Flask] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        """Признак того, что фоновая запись запущена.
+
+        Returns:
+            bool: Запущена ли запись
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, app: Flask):
+        """Запуск фоновой записи.
+
+        Args:
+            app: Flask
+        """
+        self._app = app
+        if self.enabled:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='session-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Остановка фоновой записи с записью всех сессий из очереди."""
+        atexit.unregister(self.stop)
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval * 2)
+        batch = self._collect(wait=False)
+        while batch:
+            write_sessions(self._app, batch, self.retries)  # type: ignore[arg-type]
+            batch = self._collect(wait=False)
+
+    def put(self, session: Session) -> bool:
+        """Добавление сессии в очередь на запись.
+
+        Args:
+            session: Сессия пользователя
+
+        Returns:
+            bool: False, если очередь переполнена и сессию нужно записать сразу
+        """
+        row = {column.key: getattr(session, column.key) for column in Session.__table__.columns}
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            return False
+        return True
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._collect(wait=True)
+            if batch:
+                write_sessions(self._app, batch, self.retries)  # type: ignore[arg-type]
+
+    def _collect(self, wait: bool) -> List[dict]:
+        batch: List[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                if wait:
+                    batch.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+
+session_writer = SessionWriter(
+    batch_size=CONFIG.sessions.batch_size,
+    flush_interval=CONFIG.sessions.flush_interval_sec,
+    queue_size=CONFIG.sessions.queue_size,
+    retries=CONFIG.sessions.write_retries,
+)
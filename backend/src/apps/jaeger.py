@@ -1,42 +1,234 @@
-from opentelemetry import trace
+from typing import Optional
+
+from flask import Flask
+from opentelemetry.context import Context
 from opentelemetry.exporter.jaeger.thrift import JaegerExporter
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
 from opentelemetry.instrumentation.flask import FlaskInstrumentor
+from opentelemetry.instrumentation.redis import RedisInstrumentor
+from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
 from opentelemetry.sdk.resources import SERVICE_NAME, Resource
-from opentelemetry.sdk.trace import TracerProvider, export
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor, TracerProvider, export
+from opentelemetry.sdk.trace.sampling import Decision, ParentBased, Sampler, SamplingResult, TraceIdRatioBased
+from opentelemetry.trace import SpanContext, StatusCode, TraceFlags, set_tracer_provider
 
-from core.config import CONFIG
+from apps.db import db
+from core.config import CONFIG, JaegerConfig
 
 
-def configure_tracer(host: str, port: int):
-    """Функция для конфигурации трейсера.
+class RecordingRatioSampler(TraceIdRatioBased):
+    """Выборка доли трасс, при которой не попавшие в нее корневые спаны все равно записываются, но не выгружаются.
+
+    Записанные спаны может выгрузить `TailSamplingProcessor`, если запрос оказался медленным или с ошибкой.
+    """
+
+    def should_sample(
+        self,
+        parent_context: Optional[Context],
+        trace_id: int,
+        name: str,
+        *args,
+        **kwargs,
+    ) -> SamplingResult:
+        """Решение о выборке трассы.
+
+        Args:
+            parent_context: Контекст родительского спана
+            trace_id: ID трассы
+            name: Название спана
+            args: Тип, атрибуты и связи спана и состояние трассы
+            kwargs: Они же по названиям
+
+        Returns:
+            SamplingResult: Выгрузка для доли трасс, иначе только запись
+        """
+        sampling = super().should_sample(parent_context, trace_id, name, *args, **kwargs)
+        if sampling.decision == Decision.DROP:
+            return SamplingResult(Decision.RECORD_ONLY, sampling.attributes, sampling.trace_state)
+        return sampling
+
+    def get_description(self) -> str:
+        """Описание стратегии выборки.
+
+        Returns:
+            str: Описание
+        """
+        return 'RecordingRatioSampler{{{ratio}}}'.format(ratio=self.rate)
+
+
+class TailSamplingProcessor(SpanProcessor):
+    """Обработчик, который кроме выбранных спанов передает дальше медленные и завершившиеся ошибкой.
+
+    Дочерние спаны невыбранных трасс не записываются, поэтому такой спан выгружается без них.
+    """
+
+    def __init__(self, delegate: SpanProcessor, slow_ms: int, errors: bool):
+        """При инициализации задается обработчик для выгрузки и условия отбора спанов.
+
+        Args:
+            delegate: Обработчик, который выгружает спаны
+            slow_ms: Длительность в миллисекундах, начиная с которой спан выгружается, или 0
+            errors: Выгружать ли спаны с ошибкой
+        """
+        self.delegate = delegate
+        self.slow_ns = slow_ms * 1000000
+        self.errors = errors
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None):
+        """Начало спана.
+
+        Args:
+            span: Спан
+            parent_context: Контекст родительского спана
+        """
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan):
+        """Завершение спана.
+
+        Args:
+            span: Спан
+        """
+        if span.context.trace_flags.sampled:
+            self.delegate.on_end(span)
+        elif self.keep(span):
+            self.delegate.on_end(as_sampled(span))
+
+    def keep(self, span: ReadableSpan) -> bool:
+        """Проверка, нужно ли выгрузить невыбранный спан.
+
+        Args:
+            span: Спан
+
+        Returns:
+            bool: Медленный ли спан или завершился ли он ошибкой
+        """
+        if self.errors and span.status.status_code == StatusCode.ERROR:
+            return True
+        duration = (span.end_time or 0) - (span.start_time or 0)
+        return bool(self.slow_ns) and duration >= self.slow_ns
+
+    def shutdown(self):
+        """Остановка обработчика."""
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Выгрузка накопленных спанов.
+
+        Args:
+            timeout_millis: Таймаут в миллисекундах
+
+        Returns:
+            bool: Успешно ли выгружены спаны
+        """
+        return self.delegate.force_flush(timeout_millis)
+
+
+def as_sampled(span: ReadableSpan) -> ReadableSpan:
+    """Копия спана с признаком выборки, без которого обработчик выгрузки его пропустит.
 
     Args:
-        host: Хост
-        port: Порт
+        span: Спан
+
+    Returns:
+        ReadableSpan: Копия спана
     """
-    trace.set_tracer_provider(
-        TracerProvider(
-            resource=Resource.create({SERVICE_NAME: CONFIG.flask.project_name}),
-        ),
+    context = SpanContext(
+        trace_id=span.context.trace_id,
+        span_id=span.context.span_id,
+        is_remote=span.context.is_remote,
+        trace_flags=TraceFlags(TraceFlags.SAMPLED),
+        trace_state=span.context.trace_state,
+    )
+    return ReadableSpan(
+        name=span.name,
+        context=context,
+        parent=span.parent,
+        resource=span.resource,
+        attributes=span.attributes,
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        instrumentation_info=span.instrumentation_info,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
     )
-    trace.get_tracer_provider().add_span_processor(  # type: ignore[attr-defined]
-        export.BatchSpanProcessor(
-            span_exporter=JaegerExporter(agent_host_name=host, agent_port=port),
-        ),
+
+
+def create_exporter(config: JaegerConfig) -> export.SpanExporter:
+    """Функция для создания экспортера спанов по настройкам.
+
+    Args:
+        config: Настройки трассировки
+
+    Raises:
+        ValueError: Ошибка, что экспортер не поддерживается
+
+    Returns:
+        SpanExporter: Экспортер `jaeger`, `otlp` или `console`
+    """
+    if config.exporter == 'jaeger':
+        return JaegerExporter(agent_host_name=config.host, agent_port=config.port)
+    if config.exporter == 'otlp':
+        return OTLPSpanExporter(endpoint=config.otlp_endpoint)
+    if config.exporter == 'console':
+        return export.ConsoleSpanExporter()
+    raise ValueError(f'Экспортер {config.exporter} не поддерживается')
+
+
+def create_sampler(config: JaegerConfig) -> Sampler:
+    """Функция для создания стратегии выборки трасс.
+
+    Решение о выборке наследуется от вызывающего сервиса, а для новых трасс выбирается доля `sample_ratio`.
+
+    Args:
+        config: Настройки трассировки
+
+    Returns:
+        Sampler: Стратегия выборки
+    """
+    if config.tail_slow_ms or config.tail_errors:
+        return ParentBased(root=RecordingRatioSampler(config.sample_ratio))
+    return ParentBased(root=TraceIdRatioBased(config.sample_ratio))
+
+
+def configure_tracer(config: JaegerConfig):
+    """Функция для конфигурации трейсера.
+
+    Очередь спанов ограничена: при ее переполнении новые спаны отбрасываются, а не копятся в памяти.
+
+    Args:
+        config: Настройки трассировки
+    """
+    provider = TracerProvider(
+        resource=Resource.create({SERVICE_NAME: CONFIG.flask.project_name}),
+        sampler=create_sampler(config),
     )
-    trace.get_tracer_provider().add_span_processor(  # type: ignore[attr-defined]
-        export.BatchSpanProcessor(
-            span_exporter=export.ConsoleSpanExporter(),
-        ),
+    processor: SpanProcessor = export.BatchSpanProcessor(
+        span_exporter=create_exporter(config),
+        max_queue_size=config.max_queue_size,
+        max_export_batch_size=config.max_export_batch_size,
+        schedule_delay_millis=config.schedule_delay_ms,
+        export_timeout_millis=config.export_timeout_ms,
     )
+    if config.tail_slow_ms or config.tail_errors:
+        processor = TailSamplingProcessor(processor, slow_ms=config.tail_slow_ms, errors=config.tail_errors)
+    provider.add_span_processor(processor)
+    set_tracer_provider(provider)
 
 
-def install(app):
+def install(app: Flask):
     """Установка компонента Flask для мониторинга с помощью распределённой трассировкой запросов.
 
     Args:
         app: Flask
     """
     if CONFIG.jaeger.enabled:
-        configure_tracer(host=CONFIG.jaeger.host, port=CONFIG.jaeger.port)
+        configure_tracer(CONFIG.jaeger)
         FlaskInstrumentor().instrument_app(app)
+        if CONFIG.jaeger.instrument_sqlalchemy:
+            with app.app_context():
+                SQLAlchemyInstrumentor().instrument(engine=db.engine)
+        if CONFIG.jaeger.instrument_redis:
+            RedisInstrumentor().instrument()
@@ -1,49 +1,107 @@
-from flask import Flask
-from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token
-from redis import Redis
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Union
 
-from apps.security import user_datastore as postgres
+from flask import Flask
+from flask_jwt_extended import JWTManager
+from flask_jwt_extended.config import config
+from jwt.algorithms import get_default_algorithms
+from jwt.utils import base64url_encode
+
+from apps.cache import PrincipalCache, UserPrincipal
+from apps.keys import keyring
+from apps.metrics import blocklist_latency, token_mint_latency
+from apps.redis import redis_client
+from apps.revocation import RevocationFilter, RotatingBloomFilter
 from core.config import CONFIG
 from models.user import User
 
 
-class AccessToken:
-    """Токен для получения доступа к ресурсам."""
+def compact_json(data: dict) -> bytes:
+    """Функция для компактной сериализации в JSON.
+
+    Args:
+        data: Данные
+
+    Returns:
+        bytes: JSON
+    """
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
 
-    def __init__(self, user: User):
-        """При инициализации генерирует пользователю токен.
+class TokenMinter:
+    """Класс для выпуска пары токенов пользователя за один проход.
+
+    Общие данные токенов собираются один раз, а заголовок и подготовленный ключ подписи кэшируются до смены ключей.
+    Токены совместимы с `flask_jwt_extended` и проверяются им же.
+    """
+
+    def __init__(self, compact_refresh: bool):
+        """При инициализации задается формат refresh-токена.
 
         Args:
-            user: Пользователь
+            compact_refresh: Нужно ли выпускать refresh-токен без ролей, которые при обновлении берутся из кэша
         """
-        self.access_token = create_access_token(
-            identity=user.email,
-            additional_claims={
-                'roles': [role.name for role in user.roles],
-                'user_id': user.pk,
-            },
-        )
+        self.compact_refresh = compact_refresh
+        self._header = b''
+        self._algorithm: Any = None
+        self._key: Any = None
 
+    def reset(self):
+        """Сброс заголовка и ключа подписи после загрузки ключей."""
+        header = {'alg': keyring.algorithm, 'typ': 'JWT', **keyring.headers}
+        self._header = base64url_encode(compact_json(header))
+        self._algorithm = get_default_algorithms()[keyring.algorithm]
+        self._key = self._algorithm.prepare_key(keyring.signing_key)
 
-class RefreshToken:
-    """Токен для получения новых токенов взамен старых."""
-
-    def __init__(self, user: User):
-        """При инициализации генерирует пользователю токен.
+    def mint(self, user: Union[User, UserPrincipal]) -> Dict[str, str]:
+        """Выпуск access- и refresh-токенов пользователя.
 
         Args:
             user: Пользователь
+
+        Returns:
+            Dict[str, str]: Ключ для доступа и ключ для обновления
         """
-        self.refresh_token = create_refresh_token(
-            identity=user.email,
-            additional_claims={
-                'roles': [role.name for role in user.roles],
-                'user_id': user.pk,
-            },
-        )
+        if not self._header:
+            self.reset()
+        now = datetime.now(timezone.utc)
+        timestamp = int(now.timestamp())
+        claims = {
+            'fresh': False,
+            'iat': timestamp,
+            'nbf': timestamp,
+            config.identity_claim_key: user.email,
+            'roles': [role.name for role in user.roles],
+            'user_id': str(user.pk),
+            'gen': user.token_generation or 0,
+        }
+        access_claims = {**claims, 'jti': str(uuid.uuid4()), 'type': 'access'}
+        refresh_claims = {**claims, 'jti': str(uuid.uuid4()), 'type': 'refresh'}
+        if config.access_expires:
+            access_claims['exp'] = int((now + config.access_expires).timestamp())
+        if config.refresh_expires:
+            refresh_claims['exp'] = int((now + config.refresh_expires).timestamp())
+        if self.compact_refresh:
+            refresh_claims.pop('roles')
+        return {'access_token': self.sign(access_claims), 'refresh_token': self.sign(refresh_claims)}
+
+    def sign(self, claims: dict) -> str:
+        """Подпись данных токена.
 
+        Args:
+            claims: Данные токена
 
-def generate_tokens(user: User) -> dict:
+        Returns:
+            str: Токен
+        """
+        signing_input = b'.'.join((self._header, base64url_encode(compact_json(claims))))
+        signature = self._algorithm.sign(signing_input, self._key)
+        return b'.'.join((signing_input, base64url_encode(signature))).decode('utf-8')
+
+
+def generate_tokens(user: Union[User, UserPrincipal]) -> dict:
     """Генерирует пару ключей пользователя.
 
     Args:
@@ -52,11 +110,54 @@ def generate_tokens(user: User) -> dict:
     Returns:
         dict: Ключ для доступа и ключ для обновления
     """
-    return {**AccessToken(user).__dict__, **RefreshToken(user).__dict__}
+    with token_mint_latency.time():
+        return token_minter.mint(user)
+
+
+def is_token_revoked(jwt_payload: dict) -> bool:
+    """Проверка, отозван ли токен по своему ID или вместе со всеми токенами пользователя.
+
+    Args:
+        jwt_payload: Данные токена
+
+    Returns:
+        bool: Отозван ли токен
+    """
+    with blocklist_latency.time():
+        if revoked_tokens.is_revoked(jwt_payload['jti']):
+            return True
+    principal = principal_cache.get(jwt_payload['user_id'])
+    return principal is None or jwt_payload.get('gen', 0) < principal.token_generation
 
 
 jwt = JWTManager()
-jwt_redis_blocklist = Redis(host=CONFIG.redis.host, port=CONFIG.redis.port)
+revoked_tokens = RevocationFilter(
+    redis=redis_client,
+    stream=CONFIG.blocklist.stream,
+    generations=RotatingBloomFilter(
+        capacity=CONFIG.blocklist.capacity,
+        error_rate=CONFIG.blocklist.error_rate,
+        ttl=CONFIG.flask.access_token_expires_by_sec,
+    ),
+    block_ms=CONFIG.blocklist.block_ms,
+)
+token_minter = TokenMinter(compact_refresh=CONFIG.jwt.compact_refresh)
+principal_cache = PrincipalCache(
+    redis=redis_client,
+    max_size=CONFIG.cache.principal_max_size,
+    local_ttl=CONFIG.cache.principal_local_ttl_sec,
+    ttl=CONFIG.cache.principal_ttl_sec,
+)
+
+
+def load_keys():
+    """Функция для загрузки ключей подписи токенов и подготовки ключа для выпуска токенов.
+
+    Raises:
+        ValueError: Ошибка, что активный ключ не найден
+    """
+    keyring.load(CONFIG.flask.secret_key)
+    token_minter.reset()
 
 
 def install(app: Flask):
@@ -67,15 +168,29 @@ def install(app: Flask):
     """
     app.config['SECRET_KEY'] = CONFIG.flask.secret_key
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = CONFIG.flask.access_token_expires_by_sec
+    app.config['JWT_ALGORITHM'] = CONFIG.jwt.algorithm
+    app.config['JWT_DECODE_ALGORITHMS'] = [CONFIG.jwt.algorithm]
     jwt.init_app(app)
+    principal_cache.local.clear()
+    if CONFIG.blocklist.enabled:
+        revoked_tokens.start()
+
+    @jwt.encode_key_loader
+    def signing_key_callback(identity):
+        return keyring.signing_key
+
+    @jwt.decode_key_loader
+    def verifying_key_callback(jwt_header, jwt_payload):
+        return keyring.verifying_key(jwt_header.get('kid'))
+
+    @jwt.additional_headers_loader
+    def headers_callback(identity):
+        return keyring.headers
 
     @jwt.token_in_blocklist_loader
     def check_if_token_is_revoked(jwt_header, jwt_payload: dict):
-        jti = jwt_payload['jti']
-        token_in_redis = jwt_redis_blocklist.get(jti)
-        return token_in_redis is not None
+        return is_token_revoked(jwt_payload)
 
     @jwt.user_lookup_loader
     def user_lookup_callback(jwt_header, jwt_data):
-        email = jwt_data['sub']
-        return postgres.find_user(email=email)
+        return principal_cache.get(jwt_data['user_id'])
@@ -0,0 +1,105 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+from jwt.algorithms import get_default_algorithms
+from jwt.exceptions import InvalidSignatureError
+
+from core.config import CONFIG
+
+
+class KeyRing:
+    """Набор ключей для подписи и проверки токенов.
+
+    Для асимметричных алгоритмов ключи загружаются из директории: каждый файл `<kid>.pem` содержит закрытый ключ,
+    активным ключом подписываются новые токены, а остальные используются только для проверки и публикации в JWKS.
+    Ротация выполняется добавлением нового ключа и сменой активного; старый ключ удаляется после истечения токенов.
+    Для симметричных алгоритмов используется `SECRET_KEY` приложения, а JWKS остается пустым.
+    """
+
+    def __init__(self, algorithm: str, keys_dir: str, active_kid: str):
+        """При инициализации задается алгоритм и расположение ключей.
+
+        Args:
+            algorithm: Алгоритм подписи
+            keys_dir: Директория с закрытыми ключами
+            active_kid: ID ключа для подписи новых токенов
+        """
+        self.algorithm = algorithm
+        self.keys_dir = keys_dir
+        self.active_kid = active_kid
+        self.signing_key: Any = None
+        self._verifying_keys: Dict[Optional[str], Any] = {}
+        self.jwks = json.dumps({'keys': []})
+        self.etag = ''
+
+    @property
+    def symmetric(self) -> bool:
+        """Признак симметричного алгоритма подписи.
+
+        Returns:
+            bool: Используется ли общий секретный ключ
+        """
+        return self.algorithm.startswith('HS')
+
+    def load(self, secret_key: str):
+        """Загрузка ключей и формирование JWKS.
+
+        Args:
+            secret_key: Секретный ключ приложения для симметричных алгоритмов
+
+        Raises:
+            ValueError: Ошибка, что активный ключ не найден
+        """
+        if self.symmetric:
+            self.signing_key = secret_key
+            self._verifying_keys = {None: secret_key}
+        else:
+            private_keys = {
+                path.stem: load_pem_private_key(path.read_bytes(), password=None)
+                for path in sorted(Path(self.keys_dir).glob('*.pem'))
+            }
+            if self.active_kid not in private_keys:
+                raise ValueError(f'Не найден ключ {self.active_kid} в директории {self.keys_dir}')
+            self.signing_key = private_keys[self.active_kid]
+            self._verifying_keys = {kid: key.public_key() for kid, key in private_keys.items()}
+        algorithm = get_default_algorithms()[self.algorithm]
+        keys = [
+            {**json.loads(algorithm.to_jwk(key)), 'kid': kid, 'use': 'sig', 'alg': self.algorithm}
+            for kid, key in self._verifying_keys.items()
+            if not self.symmetric
+        ]
+        self.jwks = json.dumps({'keys': keys}, sort_keys=True)
+        self.etag = hashlib.sha256(self.jwks.encode('utf-8')).hexdigest()[:32]
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Дополнительные заголовки токена.
+
+        Returns:
+            Dict[str, str]: Заголовок `kid` для асимметричных алгоритмов
+        """
+        return {} if self.symmetric else {'kid': self.active_kid}
+
+    def verifying_key(self, kid: Optional[str]) -> Any:
+        """Ключ для проверки подписи токена.
+
+        Args:
+            kid: ID ключа из заголовка токена
+
+        Raises:
+            InvalidSignatureError: Ошибка, что токен подписан неизвестным ключом
+
+        Returns:
+            Any: Открытый ключ
+        """
+        if self.symmetric:
+            return self.signing_key
+        if kid not in self._verifying_keys:
+            raise InvalidSignatureError('Неизвестный ключ подписи')
+        return self._verifying_keys[kid]
+
+
+keyring = KeyRing(algorithm=CONFIG.jwt.algorithm, keys_dir=CONFIG.jwt.keys_dir, active_kid=CONFIG.jwt.active_kid)
@@ -1,10 +1,124 @@
+import time
+from typing import Tuple
+
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from limits import RateLimitItem
+from limits.errors import ConfigurationError
+from limits.strategies import STRATEGIES, RateLimiter
+from limits.util import WindowStats
+
+from apps.redis import connection_options
+from core.config import CONFIG
+
+
+class SlidingWindowCounterRateLimiter(RateLimiter):
+    """Стратегия скользящего окна, приближенного по счетчикам текущего и предыдущего окна.
+
+    В отличие от `moving-window` хранит не журнал всех запросов, а два счетчика на ключ,
+    и проверяет лимит одним вызовом Lua-скрипта в Redis.
+    """
+
+    script = """
+        local limit, expiry, weight = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+        local cost, apply = tonumber(ARGV[4]), tonumber(ARGV[5])
+        local previous = tonumber(redis.call('GET', KEYS[1]) or '0')
+        local current = tonumber(redis.call('GET', KEYS[2]) or '0')
+        local count = math.floor(previous * weight) + current
+        if count + cost > limit then
+            return {0, count}
+        end
+        if apply == 1 and cost > 0 then
+            if redis.call('INCRBY', KEYS[2], cost) == cost then
+                redis.call('EXPIRE', KEYS[2], expiry * 2)
+            end
+            count = count + cost
+        end
+        return {1, count}
+    """
+
+    def __init__(self, storage):
+        """При инициализации проверяется, что счетчики хранятся в Redis.
+
+        Args:
+            storage: Хранилище счетчиков
+
+        Raises:
+            ConfigurationError: Ошибка, что хранилище не поддерживает стратегию
+        """
+        if not hasattr(getattr(storage, 'storage', None), 'register_script'):
+            raise ConfigurationError('Стратегия sliding-window-counter поддерживает только хранилище Redis')
+        super().__init__(storage)
+        self._script = storage.storage.register_script(self.script)
+
+    def hit(self, limit: RateLimitItem, *identifiers, cost: int = 1) -> bool:
+        """Учет запроса, если лимит не превышен.
+
+        Args:
+            limit: Лимит
+            identifiers: Идентификаторы клиента и ресурса
+            cost: Стоимость запроса
+
+        Returns:
+            bool: Можно ли выполнить запрос
+        """
+        allowed, _ = self._evaluate(limit, identifiers, cost, apply=True)
+        return allowed
+
+    def test(self, limit: RateLimitItem, *identifiers, cost: int = 1) -> bool:
+        """Проверка лимита без учета запроса.
+
+        Args:
+            limit: Лимит
+            identifiers: Идентификаторы клиента и ресурса
+            cost: Стоимость запроса
+
+        Returns:
+            bool: Можно ли выполнить запрос
+        """
+        allowed, _ = self._evaluate(limit, identifiers, cost, apply=False)
+        return allowed
+
+    def get_window_stats(self, limit: RateLimitItem, *identifiers) -> WindowStats:
+        """Состояние окна для заголовков ответа.
+
+        Args:
+            limit: Лимит
+            identifiers: Идентификаторы клиента и ресурса
+
+        Returns:
+            WindowStats: Время сброса окна и количество оставшихся запросов
+        """
+        _, count = self._evaluate(limit, identifiers, cost=0, apply=False)
+        expiry = limit.get_expiry()
+        reset = (int(time.time()) // expiry + 1) * expiry
+        return WindowStats(reset, max(0, limit.amount - count))
+
+    def _evaluate(self, limit: RateLimitItem, identifiers: tuple, cost: int, apply: bool) -> Tuple[bool, int]:
+        now = time.time()
+        expiry = limit.get_expiry()
+        window = int(now // expiry)
+        key = '{{{key}}}'.format(key=limit.key_for(*identifiers))
+        reply = self._script(
+            keys=[f'{key}/{window - 1}', f'{key}/{window}'],
+            args=[limit.amount, expiry, 1 - (now % expiry) / expiry, cost, int(apply)],
+        )
+        return bool(reply[0]), int(reply[1])
+
+
+# Словарь стратегий типизирован только встроенными в limits стратегиями
+STRATEGIES['sliding-window-counter'] = SlidingWindowCounterRateLimiter  # type: ignore[assignment]
 
 rate_limiter = Limiter(
     key_func=get_remote_address,
-    default_limits=['10/second'],
-    strategy='moving-window',
+    default_limits=[CONFIG.limiter.default],
+    strategy=CONFIG.limiter.strategy,
+    storage_uri=CONFIG.limiter.storage or 'redis://{host}:{port}'.format(
+        host=CONFIG.redis.host,
+        port=CONFIG.redis.port,
+    ),
+    storage_options={**connection_options(), 'max_connections': CONFIG.redis.max_connections},
+    swallow_errors=True,
 )
 
 
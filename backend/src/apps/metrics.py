@@ -0,0 +1,149 @@
+import os
+import time
+
+from flask import Flask, Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from apps.limiter import rate_limiter
+from apps.redis import pool_stats
+from core.config import CONFIG
+
+# Границы для операций, которые обычно укладываются в единицы миллисекунд
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+request_latency = Histogram(
+    'http_request_duration_seconds',
+    'Время обработки запроса',
+    ['method', 'endpoint'],
+)
+requests_total = Counter(
+    'http_requests_total',
+    'Количество запросов',
+    ['method', 'endpoint', 'status'],
+)
+rate_limited_total = Counter(
+    'rate_limit_rejections_total',
+    'Количество запросов, отклоненных ограничением частоты',
+    ['endpoint'],
+)
+password_hash_latency = Histogram(
+    'password_hash_duration_seconds',
+    'Время хэширования и проверки пароля в пуле потоков без ожидания в очереди',
+    ['operation'],
+    buckets=HASH_BUCKETS,
+)
+password_hash_in_flight = Gauge(
+    'password_hash_in_flight',
+    'Количество задач хэширования и проверки пароля в пуле потоков, включая ожидающие',
+    multiprocess_mode='livesum',
+)
+password_hash_queued = Gauge(
+    'password_hash_queue_depth',
+    'Количество задач хэширования и проверки пароля, ожидающих свободного потока',
+    multiprocess_mode='livesum',
+)
+blocklist_latency = Histogram(
+    'blocklist_check_duration_seconds',
+    'Время проверки токена по списку отозванных',
+    buckets=FAST_BUCKETS,
+)
+pool_checkout_latency = Histogram(
+    'db_pool_checkout_duration_seconds',
+    'Время ожидания соединения из пула PostgreSQL',
+    buckets=FAST_BUCKETS,
+)
+token_mint_latency = Histogram(
+    'token_mint_duration_seconds',
+    'Время выпуска пары токенов',
+    buckets=FAST_BUCKETS,
+)
+redis_pool_connections = Gauge(
+    'redis_pool_connections',
+    'Количество занятых соединений пула Redis и доступных без ожидания, включая еще не открытые',
+    ['state'],
+    multiprocess_mode='livesum',
+)
+
+
+def collect() -> bytes:
+    """Функция для выгрузки метрик в текстовом формате Prometheus.
+
+    Если задан каталог `PROMETHEUS_MULTIPROC_DIR`, метрики собираются из файлов всех воркеров gunicorn,
+    иначе только из текущего процесса.
+
+    Returns:
+        bytes: Метрики
+    """
+    observe_redis_pool()
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def observe_redis_pool():
+    """Функция для обновления загрузки пула соединений Redis.
+
+    Пул у каждого воркера свой, поэтому загрузка обновляется после каждого запроса, а не только при выгрузке метрик.
+    """
+    stats = pool_stats()
+    redis_pool_connections.labels('in_use').set(stats['in_use'])
+    redis_pool_connections.labels('available').set(stats['max_connections'] - stats['in_use'])
+
+
+def start_timer():
+    """Функция для запоминания времени начала запроса."""
+    g.request_started_at = time.perf_counter()
+
+
+def observe_request(response: Response) -> Response:
+    """Функция для учета времени обработки и статуса запроса.
+
+    В метку попадает шаблон маршрута, а не путь, чтобы количество рядов не зависело от ID в адресах.
+
+    Args:
+        response: Ответ
+
+    Returns:
+        Response: Тот же ответ
+    """
+    started_at = g.pop('request_started_at', None)
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    if endpoint == CONFIG.metrics.endpoint:
+        return response
+    observe_redis_pool()
+    if started_at is not None:
+        request_latency.labels(request.method, endpoint).observe(time.perf_counter() - started_at)
+    requests_total.labels(request.method, endpoint, response.status_code).inc()
+    if response.status_code == 429:
+        rate_limited_total.labels(endpoint).inc()
+    return response
+
+
+def install(app: Flask):
+    """Установка компонента Flask для выгрузки метрик Prometheus.
+
+    Args:
+        app: Flask
+    """
+    if not CONFIG.metrics.enabled:
+        return
+
+    @rate_limiter.exempt
+    def metrics() -> Response:
+        return Response(collect(), content_type=CONTENT_TYPE_LATEST)
+
+    app.before_request(start_timer)
+    app.after_request(observe_request)
+    app.add_url_rule(CONFIG.metrics.endpoint, view_func=metrics)
@@ -1,26 +1,82 @@
-import abc
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlencode
 
 from flask import Flask, redirect, url_for
-from rauth import OAuth2Service
 from werkzeug import Response
 
-from apps.utils import decode_json
-from core.config import CONFIG
+from apps.transport import OAuthTransport
+from core.config import CONFIG, OAuthConfig
 from core.enums import OAuthProviders
 
 
-class OAuthSignIn(abc.ABC):
-    """Абстрактный класс для реализации провайдера OAuth."""
+class DiscoveryDocument:
+    """Документ OpenID Connect провайдера, который загружается при первом обращении и кэшируется на время `ttl`."""
 
-    service: OAuth2Service = None
+    def __init__(self, transport: OAuthTransport, url: str, ttl: float):
+        """При инициализации задаются HTTP-клиент провайдера, адрес документа и время его жизни.
 
-    @abc.abstractmethod
-    def callback(self, code: str) -> str:
-        """Завершение аутентификациии с провайдером и получения информации о пользователе.
+        Args:
+            transport: HTTP-клиент провайдера
+            url: Адрес документа OpenID Connect
+            ttl: Время жизни документа в секундах
+        """
+        self.transport = transport
+        self.url = url
+        self.ttl = ttl
+        self._document: Dict[str, str] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Dict[str, str]:
+        """Получение документа с загрузкой, если он еще не загружен или устарел.
+
+        Returns:
+            Dict[str, str]: Документ OpenID Connect
+        """
+        with self._lock:
+            expired = self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+            if expired:
+                self._document = self.transport.get(self.url).json()
+                self._loaded_at = time.monotonic()
+            return self._document
+
+
+class OAuthProvider:
+    """Провайдер OAuth2, поведение которого целиком задается настройками.
+
+    Адреса берутся из настроек, а недостающие из документа OpenID Connect, который загружается при первом
+    обращении и кэшируется. ID пользователя читается из ответа с данными пользователя по полю `user_id_field`,
+    а если адрес данных не задан, то из ответа с токеном.
+    """
+
+    endpoints = {
+        'authorize_url': 'authorization_endpoint',
+        'token_url': 'token_endpoint',
+        'userinfo_url': 'userinfo_endpoint',
+    }
+
+    def __init__(self, name: str, config: OAuthConfig):
+        """При инициализации задаются название провайдера и настройки подключения к нему.
 
         Args:
-            code: Код авторизации для получения данных пользователя
+            name: Название провайдера
+            config: Настройки провайдера
+        """
+        self.name = name
+        self.config = config
+        self.transport = OAuthTransport(name, config)
+        self.discovery = DiscoveryDocument(self.transport, config.discovery_url, config.discovery_ttl_sec)
+
+    @property
+    def configured(self) -> bool:
+        """Признак того, что указаны данные приложения для подключения к провайдеру.
+
+        Returns:
+            bool: Заданы ли client_id и client_secret
         """
+        return bool(self.config.id and self.config.secret)
 
     @property
     def callback_url(self) -> str:
@@ -29,7 +85,23 @@ class OAuthSignIn(abc.ABC):
         Returns:
             str: Url-адрес для обратного вызова при аутентификациии через OAuth
         """
-        return url_for('sessions.sessionbyoauth', provider_name=self.service.name, _external=True)
+        return url_for('sessions.sessionbyoauth', provider_name=self.name, _external=True)
+
+    def url(self, setting: str) -> str:
+        """Получение адреса провайдера из настроек или из документа OpenID Connect.
+
+        Args:
+            setting: Название настройки `authorize_url`, `token_url` или `userinfo_url`
+
+        Returns:
+            str: Url-адрес или пустая строка, если провайдер его не предоставляет
+        """
+        configured_url = getattr(self.config, setting)
+        if configured_url:
+            return configured_url
+        if not self.config.discovery_url:
+            return ''
+        return self.discovery.get().get(self.endpoints[setting], '')
 
     def authorize(self) -> Response:
         """Перенаправление на сайт провайдера, где пользователь должен пройти аутентификациию.
@@ -37,84 +109,91 @@ class OAuthSignIn(abc.ABC):
         Returns:
             Response: Ответ в виде переадресации на нужный адрес
         """
-        return redirect(location=self.service.get_authorize_url(
-            response_type='code',
-            redirect_uri=self.callback_url,
-        ))
+        query = {'response_type': 'code', 'client_id': self.config.id, 'redirect_uri': self.callback_url}
+        if self.config.scope:
+            query['scope'] = self.config.scope
+        return redirect(location='{url}?{query}'.format(url=self.url('authorize_url'), query=urlencode(query)))
 
-
-class YandexSignIn(OAuthSignIn):
-    """Класс для реализации провайдера Yandex, который реализует OAuth2."""
-
-    def __init__(self, client_id: str, client_secret: str):
-        """При инициализации требуется client_id и client_secret, которые назначены приложению в Yandex.
+    def fetch_token(self, code: str) -> dict:
+        """Обмен кода авторизации на токен доступа провайдера.
 
         Args:
-            client_id: Идентификатор приложения
-            client_secret: Секретный код
+            code: Код авторизации
+
+        Returns:
+            dict: Ответ провайдера с токеном
         """
-        self.service = OAuth2Service(
-            name='yandex',
-            client_id=client_id,
-            client_secret=client_secret,
-            authorize_url='https://oauth.yandex.com/authorize',
-            access_token_url='https://oauth.yandex.com/token',
-            base_url='https://login.yandex.ru/',
-        )
+        data = {
+            'code': code,
+            'grant_type': 'authorization_code',
+            'redirect_uri': self.callback_url,
+            'client_id': self.config.id,
+            'client_secret': self.config.secret,
+        }
+        return self.transport.post(self.url('token_url'), data=data).json()
 
     def callback(self, code: str) -> str:
-        """Метод обратного вызова после проверки подлинности данных пользователя в Yandex.
+        """Завершение аутентификациии с провайдером и получение ID пользователя.
 
         Args:
-            code: Код для доступа к данным пользователя
+            code: Код авторизации для получения данных пользователя
 
         Returns:
-            str: ID пользователя в Yandex
+            str: ID пользователя у провайдера
         """
-        data = {
-            'code': code,
-            'grant_type': 'authorization_code',
-        }
-        oauth_session = self.service.get_auth_session(data=data, decoder=decode_json)
-        response = oauth_session.get('info').json()
-        return response['id']
+        user_info = self.fetch_token(code)
+        userinfo_url = self.url('userinfo_url')
+        if userinfo_url:
+            scheme, token = self.config.auth_scheme, user_info['access_token']
+            headers = {'Authorization': '{scheme} {token}'.format(scheme=scheme, token=token)}
+            user_info = self.transport.get(userinfo_url, headers=headers).json()
+        return str(user_info[self.config.user_id_field])
+
 
+class OAuthRegistry:
+    """Реестр провайдеров OAuth, которые создаются при первом обращении к ним.
 
-class VkSignIn(OAuthSignIn):
-    """Класс для реализации провайдера VK, который реализует OAuth2."""
+    Пока провайдер не используется, для него не создаются ни пул соединений, ни другие объекты.
+    """
 
-    def __init__(self, client_id: str, client_secret: str):
-        """При инициализации требуется client_id и client_secret, которые назначены приложению в VK.
+    def __init__(self, configs: Dict[str, OAuthConfig]):
+        """При инициализации задаются настройки всех известных провайдеров.
 
         Args:
-            client_id: Идентификатор приложения
-            client_secret: Секретный код
+            configs: Настройки провайдеров по их названиям
         """
-        self.service = OAuth2Service(
-            name='vk',
-            client_id=client_id,
-            client_secret=client_secret,
-            authorize_url='https://oauth.vk.com/authorize',
-            access_token_url='https://oauth.vk.com/access_token',
-            base_url='https://api.vk.com/method/',
-        )
+        self.configs = configs
+        self._providers: Dict[str, OAuthProvider] = {}
+        self._lock = threading.Lock()
 
-    def callback(self, code: str) -> str:
-        """Метод обратного вызова после проверки подлинности данных пользователя в VK.
+    def get(self, name: str) -> Optional[OAuthProvider]:
+        """Получение провайдера по названию.
 
         Args:
-            code: Код для доступа к данным пользователя
+            name: Название провайдера
 
         Returns:
-            str: ID пользователя в VK
+            Optional[OAuthProvider]: Провайдер или None, если такой провайдер неизвестен
         """
-        data = {
-            'code': code,
-            'grant_type': 'authorization_code',
-            'redirect_uri': self.callback_url,
-        }
-        response = self.service.get_raw_access_token(data=data).json()
-        return response['user_id']
+        provider = self._providers.get(name)
+        if provider:
+            return provider
+        if name not in self.configs:
+            return None
+        with self._lock:
+            if name not in self._providers:
+                self._providers[name] = OAuthProvider(name, self.configs[name])
+            return self._providers[name]
+
+    def register(self, provider: OAuthProvider):
+        """Добавление готового провайдера в реестр с заменой прежнего.
+
+        Args:
+            provider: Провайдер
+        """
+        with self._lock:
+            self.configs[provider.name] = provider.config
+            self._providers[provider.name] = provider
 
 
 def install(app: Flask):
@@ -123,13 +202,6 @@ def install(app: Flask):
     Args:
         app: Flask
     """
-    app.config['OAUTH_PROVIDERS'] = {
-        OAuthProviders.YANDEX.value: YandexSignIn(
-            client_id=CONFIG.yandex.id,
-            client_secret=CONFIG.yandex.secret,
-        ),
-        OAuthProviders.VK.value: VkSignIn(
-            client_id=CONFIG.vk.id,
-            client_secret=CONFIG.vk.secret,
-        ),
-    }
+    app.config['OAUTH_PROVIDERS'] = OAuthRegistry({
+        provider.value: getattr(CONFIG, provider.value) for provider in OAuthProviders
+    })
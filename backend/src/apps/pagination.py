@@ -0,0 +1,269 @@
+import base64
+import bisect
+import hashlib
+import hmac
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+from uuid import UUID
+
+from flask import request
+from flask_sqlalchemy.query import Query
+from marshmallow import ValidationError, fields
+from sqlalchemy import tuple_
+from sqlalchemy.sql import ColumnElement
+from werkzeug.exceptions import BadRequest
+
+from core.config import CONFIG
+
+NEXT = 'next'
+PREV = 'prev'
+INVALID_CURSOR = 'Некорректный курсор'
+
+
+class Cursor(NamedTuple):
+    """Курсор, указывающий на крайний элемент полученной страницы."""
+
+    direction: str
+    position: list
+
+
+class Page(NamedTuple):
+    """Страница выдачи с курсорами на соседние страницы."""
+
+    rows: list
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Заголовки ответа со ссылками на соседние страницы.
+
+        Returns:
+            Dict[str, str]: Заголовок `Link`, а также курсоры в `X-Next-Cursor` и `X-Prev-Cursor`
+        """
+        headers, links = {}, []
+        for rel, cursor in ((NEXT, self.next_cursor), (PREV, self.prev_cursor)):
+            if cursor:
+                headers[f'X-{rel.title()}-Cursor'] = cursor
+                query = urlencode({**request.args.to_dict(), 'cursor': cursor})
+                links.append(f'<{request.base_url}?{query}>; rel="{rel}"')
+        if links:
+            headers['Link'] = ', '.join(links)
+        return headers
+
+
+def b64encode(data: bytes) -> str:
+    """Кодирование в base64 для URL без выравнивания.
+
+    Args:
+        data: Данные
+
+    Returns:
+        str: Строка base64
+    """
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def b64decode(data: str) -> bytes:
+    """Декодирование строки base64 для URL без выравнивания.
+
+    Args:
+        data: Строка base64
+
+    Returns:
+        bytes: Данные
+    """
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def seek_filter(
+    columns: Sequence[ColumnElement],
+    position: list,
+    reverse: bool,
+) -> Tuple[ColumnElement, ColumnElement]:
+    """Условие выдачи элементов, которые идут после позиции курсора в порядке сортировки.
+
+    Args:
+        columns: Столбцы уникального ключа сортировки
+        position: Значения ключа сортировки из курсора
+        reverse: Сортировка по убыванию
+
+    Raises:
+        ValueError: Ошибка, что курсор выдан для другого ключа сортировки
+
+    Returns:
+        Tuple[ColumnElement, ColumnElement]: Условие по первому столбцу и по всему ключу
+    """
+    if len(position) != len(columns):
+        raise ValueError(INVALID_CURSOR)
+    parsers: Dict[Any, Callable[[Any], Any]] = {datetime: datetime.fromisoformat, UUID: UUID}
+    bound = [
+        parsers.get(column.type.python_type, column.type.python_type)(value)
+        for column, value in zip(columns, position)
+    ]
+    # Отдельное условие по первому столбцу позволяет планировщику отсечь партиции и лишние диапазоны индекса
+    if reverse:
+        return columns[0] <= bound[0], tuple_(*columns) < tuple_(*bound)
+    return columns[0] >= bound[0], tuple_(*columns) > tuple_(*bound)
+
+
+class CursorPaginator:
+    """Постраничная выдача по курсору вместо `OFFSET`.
+
+    Курсор содержит значения ключа сортировки у крайнего элемента страницы и направление выдачи,
+    кодируется в base64 и подписывается HMAC, поэтому клиент не может его подделать.
+    Ключ сортировки должен быть уникальным, например дата и ID.
+    """
+
+    def __init__(self, secret_key: str):
+        """При инициализации задается ключ подписи курсоров.
+
+        Args:
+            secret_key: Ключ подписи
+        """
+        self.secret_key = secret_key.encode('utf-8')
+
+    def encode(self, direction: str, position: Sequence[Any]) -> str:
+        """Кодирование курсора.
+
+        Args:
+            direction: Направление выдачи `next` или `prev`
+            position: Значения ключа сортировки у крайнего элемента страницы
+
+        Returns:
+            str: Курсор
+        """
+        encoded = [value.isoformat() if isinstance(value, datetime) else str(value) for value in position]
+        payload = json.dumps([direction, encoded], separators=(',', ':')).encode('utf-8')
+        return '{0}.{1}'.format(b64encode(payload), b64encode(self._sign(payload)))
+
+    def decode(self, cursor: str) -> Cursor:
+        """Декодирование курсора с проверкой подписи.
+
+        Args:
+            cursor: Курсор
+
+        Raises:
+            ValueError: Ошибка, что курсор поврежден или подделан
+
+        Returns:
+            Cursor: Направление выдачи и значения ключа сортировки
+        """
+        try:
+            payload, signature = map(b64decode, cursor.split('.'))
+        except (TypeError, ValueError) as error:
+            raise ValueError(INVALID_CURSOR) from error
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            raise ValueError(INVALID_CURSOR)
+        direction, position = json.loads(payload)
+        if direction not in {NEXT, PREV}:
+            raise ValueError(INVALID_CURSOR)
+        return Cursor(direction, position)
+
+    def paginate(
+        self,
+        query: Query,
+        columns: Sequence[ColumnElement],
+        cursor: Optional[Cursor],
+        per_page: int,
+        descending: bool = False,
+    ) -> Page:
+        """Получение страницы из запроса к базе данных.
+
+        Args:
+            query: Запрос без сортировки
+            columns: Столбцы уникального ключа сортировки
+            cursor: Курсор из запроса
+            per_page: Размер страницы
+            descending: Сортировка по убыванию
+
+        Raises:
+            BadRequest: Ошибка, что курсор выдан для другого ключа сортировки
+
+        Returns:
+            Page: Страница
+        """
+        backward = bool(cursor and cursor.direction == PREV)
+        reverse = descending != backward
+        if cursor:
+            try:
+                query = query.filter(*seek_filter(columns, cursor.position, reverse))
+            except (TypeError, ValueError) as error:
+                raise BadRequest(INVALID_CURSOR) from error
+        query = query.order_by(*(column.desc() if reverse else column.asc() for column in columns))
+        rows = query.limit(per_page + 1).all()
+        return self._page(rows, per_page, cursor, backward, lambda row: [getattr(row, col.key) for col in columns])
+
+    def paginate_sequence(
+        self,
+        rows: Sequence[Any],
+        key: Callable[[Any], Tuple],
+        cursor: Optional[Cursor],
+        per_page: int,
+    ) -> Page:
+        """Получение страницы из отсортированной по возрастанию последовательности в памяти.
+
+        Args:
+            rows: Элементы, отсортированные по ключу
+            key: Функция, которая возвращает уникальный ключ сортировки элемента в виде строк
+            cursor: Курсор из запроса
+            per_page: Размер страницы
+
+        Returns:
+            Page: Страница
+        """
+        backward = bool(cursor and cursor.direction == PREV)
+        # Параметр key у bisect появился только в Python 3.10, поэтому поиск идет по заранее вычисленным ключам
+        keys = [list(key(row)) for row in rows]
+        if cursor is None:
+            start, end = 0, per_page + 1
+        elif backward:
+            end = bisect.bisect_left(keys, cursor.position)
+            start = max(0, end - per_page - 1)
+        else:
+            start = bisect.bisect_right(keys, cursor.position)
+            end = start + per_page + 1
+        window = list(rows[start:end])
+        if backward:
+            window.reverse()
+        return self._page(window, per_page, cursor, backward, lambda row: list(key(row)))
+
+    def _page(
+        self,
+        rows: list,
+        per_page: int,
+        cursor: Optional[Cursor],
+        backward: bool,
+        key: Callable[[Any], list],
+    ) -> Page:
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backward:
+            rows.reverse()
+        if not rows:
+            return Page(rows, None, None)
+        has_next = True if backward else has_more
+        has_prev = has_more if backward else cursor is not None
+        return Page(
+            rows=rows,
+            next_cursor=self.encode(NEXT, key(rows[-1])) if has_next else None,
+            prev_cursor=self.encode(PREV, key(rows[0])) if has_prev else None,
+        )
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self.secret_key, payload, hashlib.sha256).digest()[:16]
+
+
+class CursorField(fields.Field):
+    """Поле для подписанного курсора постраничной выдачи."""
+
+    def _deserialize(self, value: str, attr, data, **kwargs) -> Cursor:
+        try:
+            return paginator.decode(value)
+        except ValueError as error:
+            raise ValidationError(INVALID_CURSOR) from error
+
+
+paginator = CursorPaginator(secret_key=CONFIG.flask.secret_key)
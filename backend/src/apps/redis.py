@@ -0,0 +1,50 @@
+from typing import Dict
+
+from redis import BlockingConnectionPool, Redis
+
+from core.config import CONFIG
+
+
+def connection_options() -> dict:
+    """Функция для получения настроек соединений с Redis.
+
+    Таймаут чтения должен быть больше времени блокирующего ожидания из потока отозванных токенов.
+
+    Returns:
+        dict: Настройки соединений
+    """
+    return {
+        'socket_timeout': CONFIG.redis.socket_timeout_sec,
+        'socket_connect_timeout': CONFIG.redis.connect_timeout_sec,
+        'socket_keepalive': True,
+        'health_check_interval': CONFIG.redis.health_check_interval_sec,
+    }
+
+
+def pool_stats() -> Dict[str, int]:
+    """Функция для получения загрузки пула соединений.
+
+    Returns:
+        Dict[str, int]: Размер пула, количество открытых, занятых и свободных соединений
+    """
+    # В очереди пула лежат свободные соединения и None на месте еще не открытых, а занятых в ней нет
+    slots = list(redis_pool.pool.queue)
+    idle = sum(1 for connection in slots if connection is not None)
+    in_use = redis_pool.max_connections - len(slots)
+    return {
+        'max_connections': redis_pool.max_connections,
+        'created': in_use + idle,
+        'in_use': in_use,
+        'idle': idle,
+    }
+
+
+# Пул блокирует запрос при исчерпании соединений, а не открывает новые; под gevent блокируется только гринлет
+redis_pool = BlockingConnectionPool(
+    host=CONFIG.redis.host,
+    port=CONFIG.redis.port,
+    max_connections=CONFIG.redis.max_connections,
+    timeout=CONFIG.redis.pool_timeout_sec,
+    **connection_options(),
+)
+redis_client = Redis(connection_pool=redis_pool)
@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Iterator, Optional, Set
+
+from redis import Redis
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Фильтр Блума для проверки принадлежности строки к множеству с вероятностью ложноположительного ответа."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        """При инициализации размер фильтра и количество хэш-функций рассчитываются по ожидаемому числу элементов.
+
+        Args:
+            capacity: Ожидаемое количество элементов
+            error_rate: Допустимая вероятность ложноположительного ответа
+        """
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, member: str):
+        """Добавление элемента в фильтр.
+
+        Args:
+            member: Элемент
+        """
+        for position in self._positions(member):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, member: object) -> bool:
+        """Проверка наличия элемента в фильтре.
+
+        Args:
+            member: Элемент
+
+        Returns:
+            bool: False, если элемента точно нет, иначе True
+        """
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(str(member)))
+
+    def _positions(self, member: str) -> Iterator[int]:
+        digest = hashlib.blake2b(member.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + index * second) % self.size for index in range(self.hashes))
+
+
+class RotatingBloomFilter:
+    """Потокобезопасный фильтр Блума из двух поколений, которые сменяются раз в заданный срок.
+
+    Элемент находится в течение как минимум одного срока после добавления, а размер фильтра не растет.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, ttl: int):
+        """При инициализации задаются параметры поколений и срок их смены.
+
+        Args:
+            capacity: Ожидаемое количество элементов за срок
+            error_rate: Допустимая вероятность ложноположительного ответа
+            ttl: Срок смены поколений в секундах
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.ttl = ttl
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = BloomFilter(capacity, error_rate)
+        self._rotated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, member: str):
+        """Добавление элемента в текущее поколение.
+
+        Args:
+            member: Элемент
+        """
+        with self._lock:
+            self._rotate()
+            self._current.add(member)
+
+    def __contains__(self, member: object) -> bool:
+        """Проверка наличия элемента в одном из поколений.
+
+        Args:
+            member: Элемент
+
+        Returns:
+            bool: False, если элемента точно нет, иначе True
+        """
+        with self._lock:
+            self._rotate()
+            return member in self._current or member in self._previous
+
+    def _rotate(self):
+        if time.monotonic() - self._rotated_at < self.ttl:
+            return
+        self._previous = self._current
+        self._current = BloomFilter(self.capacity, self.error_rate)
+        self._rotated_at = time.monotonic()
+
+
+class RevocationFilter:
+    """Фильтр отозванных токенов в памяти процесса, который синхронизируется через поток (stream) в Redis.
+
+    Обращение к Redis за ключом токена происходит, только если фильтр сообщает о возможном совпадении
+    или если синхронизация с потоком отстает.
+    Фильтр состоит из двух поколений, которые сменяются раз в срок жизни токена, поэтому его размер не растет.
+    """
+
+    def __init__(self, redis: Redis, stream: str, generations: RotatingBloomFilter, block_ms: int):
+        """При инициализации задается клиент Redis и фильтр, который хранит отозванные токены.
+
+        Args:
+            redis: Клиент Redis
+            stream: Название потока с отозванными токенами
+            generations: Фильтр со сменой поколений раз в срок жизни токена
+            block_ms: Время ожидания новых записей из потока в миллисекундах
+        """
+        self.redis = redis
+        self.stream = stream
+        self.generations = generations
+        self.block_ms = block_ms
+        self._synced_at: Optional[float] = None
+        self._reader: Optional[threading.Thread] = None
+
+    @property
+    def synced(self) -> bool:
+        """Признак того, что фильтр недавно получал обновления из потока.
+
+        Returns:
+            bool: Синхронизирован ли фильтр
+        """
+        return self._synced_at is not None and time.monotonic() - self._synced_at < self.block_ms / 1000 + 1
+
+    def start(self):
+        """Запуск фоновой синхронизации фильтра с потоком отозванных токенов."""
+        if self._reader and self._reader.is_alive():
+            return
+        self._reader = threading.Thread(target=self._read_stream, name='revocation-filter', daemon=True)
+        self._reader.start()
+
+    def revoke(self, jti: str):
+        """Отзыв токена.
+
+        Args:
+            jti: ID токена
+        """
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.set(jti, value='', ex=self.generations.ttl)
+        pipeline.xadd(self.stream, {'jti': jti}, maxlen=self.generations.capacity, approximate=True)
+        pipeline.execute()
+        self.generations.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        """Проверка, отозван ли токен.
+
+        Args:
+            jti: ID токена
+
+        Returns:
+            bool: Отозван ли токен
+        """
+        return bool(self.find_revoked(jti))
+
+    def find_revoked(self, *jtis: str) -> Set[str]:
+        """Проверка нескольких токенов одним запросом к Redis.
+
+        Args:
+            jtis: ID токенов
+
+        Returns:
+            Set[str]: ID отозванных токенов
+        """
+        synced = self.synced
+        candidates = [jti for jti in jtis if not synced or jti in self.generations]
+        if not candidates:
+            return set()
+        revoked = self.redis.mget(candidates)
+        return {jti for jti, marker in zip(candidates, revoked) if marker is not None}
+
+    def _read_stream(self, batch_size: int = 1000):
+        last_id = '0-0'
+        while True:
+            try:
+                response = self.redis.xread({self.stream: last_id}, count=batch_size, block=self.block_ms)
+            except Exception:
+                self._synced_at = None
+                logger.exception('Не удалось прочитать поток отозванных токенов')
+                time.sleep(1)
+                continue
+            # Читается один поток, поэтому ответ либо пустой, либо из одной пары (поток, записи)
+            entries = response[0][1] if response else []
+            for entry_id, fields in entries:
+                self.generations.add(fields[b'jti'].decode('utf-8'))
+                last_id = entry_id
+            if len(entries) < batch_size:
+                self._synced_at = time.monotonic()
@@ -1,47 +1,169 @@
-from typing import Optional
+from datetime import datetime
+from typing import Iterable, List, Optional, Set, Union
+from uuid import UUID, uuid4
 
 from flask import Flask
 from flask_security import Security, SQLAlchemyUserDatastore
-from flask_security.utils import verify_password
-from sqlalchemy import and_
+from flask_sqlalchemy.query import Query
+from sqlalchemy import Text, and_, any_, cast, literal, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.sql import ColumnElement
 from werkzeug.user_agent import UserAgent
 
-from apps.db import db
-from apps.utils import generate_random_email, generate_random_string
+from apps.cache import SocialAccountCache, UserPrincipal
+from apps.catalog import RoleCatalog, RoleChangeTracker
+from apps.db import RoutingSession, db
+from apps.hashing import password_hasher
+from apps.history import session_writer
+from apps.jwt import principal_cache
+from apps.redis import redis_client
+from apps.utils import generate_random_email
 from core.config import CONFIG
-from models.role import Role
+from models.role import Role, roles_users
 from models.session import Session
 from models.user import SocialAccount, User
 
+# Аккаунт вставляется первым, а пользователь только если вставка аккаунта прошла:
+# внешний ключ проверяется в конце запроса, поэтому порядок вставок внутри него не важен
+UPSERT_SOCIAL_USER = '''
+    WITH social AS (
+        INSERT INTO social_account (pk, user_pk, social_id, social_name)
+        VALUES (:social_pk, :user_pk, :social_id, :social_name)
+        ON CONFLICT ON CONSTRAINT social_pk DO NOTHING
+        RETURNING user_pk
+    ), new_user AS (
+        INSERT INTO users (pk, email, password, active, token_generation)
+        SELECT user_pk, :email, NULL, true, 0 FROM social
+    )
+    SELECT user_pk FROM social
+'''
 
-class CustomUserDatastore(SQLAlchemyUserDatastore):
-    """Класс для работы с базой данных пользователей."""
 
-    def authenticate_user(self, email: str, password: str) -> Optional[User]:
-        """Аутентифицирует и возвращает пользователя, если переданы верные данные.
+def any_of(column: ColumnElement, user_pks: Iterable[UUID]) -> ColumnElement:
+    """Условие на вхождение ID в список, который передается одним параметром-массивом.
+
+    Args:
+        column: Столбец с ID пользователя
+        user_pks: ID пользователей
+
+    Returns:
+        ColumnElement: Условие `column = ANY(...)`
+    """
+    array = literal([str(user_pk) for user_pk in user_pks], ARRAY(Text))
+    return column == any_(cast(array, ARRAY(PG_UUID(as_uuid=True))))
+
+
+class RoleMembershipDatastore(SQLAlchemyUserDatastore):
+    """Класс для работы с назначением ролей пользователям и отзывом их токенов."""
+
+    def revoke_role_tokens(self, role: Role) -> List[UUID]:
+        """Отзыв всех выданных участникам роли токенов одним запросом.
 
         Args:
-            email: Почта
-            password: Пароль
+            role: Роль
 
         Returns:
-            Optional[User]: Пользователь после аутентификации или None, если не прошел проверку
+            List[UUID]: ID пользователей, которым назначена роль
         """
-        user = self.find_user(email=email)
-        return user if user and verify_password(password, user.password) else None
+        members = select(roles_users.c.user_pk).where(roles_users.c.role_pk == role.pk)
+        # Загруженные пользователи не обновляются: изменения фиксируются сразу, а фиксация сбрасывает их состояние
+        statement = (
+            update(User)
+            .where(User.pk.in_(members))
+            .values(token_generation=User.token_generation + 1)
+            .returning(User.pk)
+            .execution_options(synchronize_session=False)
+        )
+        return list(self.db.session.execute(statement).scalars())
 
-    def create_session(self, user: User, user_agent: UserAgent) -> Session:
-        """Создает и возвращает новую сессию пользователю.
+    def revoke_tokens(self, *user_pks: UUID):
+        """Отзыв всех выданных пользователям токенов.
+
+        Увеличивается поколение токенов пользователя, и токены с меньшим поколением перестают приниматься.
+
+        Args:
+            user_pks: ID пользователей
+        """
+        if not user_pks:
+            return
+        self.db.session.execute(
+            update(User)
+            .where(any_of(User.pk, user_pks))
+            .values(token_generation=User.token_generation + 1)
+            .execution_options(synchronize_session='fetch'),
+        )
+
+    def add_role_to_user(self, user: User, role: Role) -> bool:
+        """Назначение роли пользователю, которое не создает дубликатов при повторном или параллельном вызове.
 
         Args:
             user: Пользователь
-            user_agent: Объект с данными `User-Agent`
+            role: Роль
 
         Returns:
-            Session: Сессия пользователя
+            bool: False, если роль уже была назначена
         """
-        session = Session(user_pk=user.pk, user_agent=user_agent.string, user_device_type=user_agent)
-        return self.put(session)
+        user, role = self._prepare_role_modify_args(user, role)
+        self.db.session.flush()
+        statement = pg_insert(roles_users).values(user_pk=user.pk, role_pk=role.pk).on_conflict_do_nothing()
+        added = self.db.session.execute(statement).rowcount > 0
+        self.db.session.expire(user, ['roles'])
+        return added
+
+    def find_existing_users(self, user_pks: Iterable[UUID]) -> Set[UUID]:
+        """Поиск ID пользователей, которые есть в базе данных.
+
+        Args:
+            user_pks: ID пользователей
+
+        Returns:
+            Set[UUID]: ID найденных пользователей
+        """
+        return set(self.db.session.execute(select(User.pk).where(any_of(User.pk, user_pks))).scalars())
+
+    def add_role_to_users(self, role: Role, user_pks: Iterable[UUID]) -> Set[UUID]:
+        """Назначение роли пользователям одним запросом.
+
+        Args:
+            role: Роль
+            user_pks: ID пользователей
+
+        Returns:
+            Set[UUID]: ID пользователей, которым роль была назначена
+        """
+        users = select(User.pk, literal(role.pk, PG_UUID(as_uuid=True))).where(any_of(User.pk, user_pks))
+        statement = (
+            pg_insert(roles_users)
+            .from_select([roles_users.c.user_pk, roles_users.c.role_pk], users)
+            .on_conflict_do_nothing()
+            .returning(roles_users.c.user_pk)
+        )
+        return set(self.db.session.execute(statement).scalars())
+
+    def remove_role_from_users(self, role: Role, user_pks: Iterable[UUID]) -> Set[UUID]:
+        """Отзыв роли у пользователей одним запросом.
+
+        Args:
+            role: Роль
+            user_pks: ID пользователей
+
+        Returns:
+            Set[UUID]: ID пользователей, у которых роль была отозвана
+        """
+        statement = (
+            roles_users.delete()
+            .where(roles_users.c.role_pk == role.pk, any_of(roles_users.c.user_pk, user_pks))
+            .returning(roles_users.c.user_pk)
+        )
+        return set(self.db.session.execute(statement).scalars())
+
+
+class SocialAccountDatastore(SQLAlchemyUserDatastore):
+    """Класс для работы с аккаунтами пользователей в социальных сервисах."""
+
+    upsert_social_user = text(UPSERT_SOCIAL_USER)
 
     def create_social_account(self, user: User, social_id: str, social_name: str) -> SocialAccount:
         """Создание социального аккаунта у пользователя.
@@ -72,27 +194,134 @@ class CustomUserDatastore(SQLAlchemyUserDatastore):
         )
         return query.first()
 
-    def find_or_create_user(self, social_id: str, social_name: str) -> User:
+    def find_or_create_user(self, social_id: str, social_name: str) -> Optional[UserPrincipal]:
         """Поиск или создание пользователя по ID в социальном сервисе.
 
+        Соответствие аккаунта и пользователя берется из кэша, а при промахе пользователь с аккаунтом
+        создается одним запросом `INSERT ... ON CONFLICT`, поэтому параллельные входы не создают дубликатов.
+        Пароль у такого пользователя не задается, войти по почте и паролю он не может.
+
         Args:
             social_id: ID пользователя в социальном сервисе
             social_name: Название социального сервиса
 
         Returns:
-            User: Пользователь с идентификацией по его ID в социальном сервисе
+            Optional[UserPrincipal]: Пользователь с идентификацией по его ID в социальном сервисе или None,
+                если его не удалось найти или создать
+        """
+        cached_pk = social_accounts.get(social_name, social_id)
+        if cached_pk:
+            principal = principal_cache.get(cached_pk)
+            if principal:
+                return principal
+            social_accounts.delete(social_name, social_id)
+        user_pk = self.upsert_user(social_id, social_name)
+        if user_pk is None:
+            return None
+        social_accounts.set(social_name, social_id, user_pk)
+        return principal_cache.get(user_pk)
+
+    def upsert_user(self, social_id: str, social_name: str) -> Optional[UUID]:
+        """Создание пользователя с аккаунтом в социальном сервисе, если аккаунта еще нет.
+
+        Args:
+            social_id: ID пользователя в социальном сервисе
+            social_name: Название социального сервиса
+
+        Returns:
+            Optional[UUID]: ID пользователя или None, если аккаунт удалили сразу после конфликта при вставке
+        """
+        user_pk = self.db.session.execute(self.upsert_social_user, {
+            'social_pk': str(uuid4()),
+            'user_pk': str(uuid4()),
+            'social_id': social_id,
+            'social_name': social_name,
+            'email': generate_random_email(8),
+        }).scalar()
+        self.commit()
+        if user_pk is not None:
+            return user_pk
+        # Аккаунт уже есть или его только что создал параллельный запрос
+        account = self.find_social_account(social_id, social_name)
+        return account.user_pk if account else None
+
+
+class CustomUserDatastore(RoleMembershipDatastore, SocialAccountDatastore):
+    """Класс для работы с базой данных пользователей."""
+
+    def authenticate_user(self, email: str, password: str) -> Optional[User]:
+        """Аутентифицирует и возвращает пользователя, если переданы верные данные.
+
+        Args:
+            email: Почта
+            password: Пароль
+
+        Returns:
+            Optional[User]: Пользователь после аутентификации или None, если не прошел проверку
+        """
+        user = self.find_user(email=email)
+        return user if user and user.password and password_hasher.verify(password, user.password) else None
+
+    def find_role(self, role: str) -> Optional[Role]:
+        """Поиск роли по названию в справочнике ролей, а при его промахе в базе данных.
+
+        Args:
+            role: Название
+
+        Returns:
+            Optional[Role]: Роль в текущей сессии базы данных или None, если ее нет
+        """
+        cached = role_catalog.get(role)
+        if cached:
+            return self.db.session.merge(cached, load=False)
+        found = super().find_role(role)
+        if found:
+            role_catalog.clear()
+        return found
+
+    def create_session(self, user: Union[User, UserPrincipal], user_agent: UserAgent) -> Session:
+        """Создает и возвращает новую сессию пользователю.
+
+        При включенной отложенной записи сессия ставится в очередь и попадает в базу данных в фоне.
+
+        Args:
+            user: Пользователь
+            user_agent: Объект с данными `User-Agent`
+
+        Returns:
+            Session: Сессия пользователя
+        """
+        session = Session(
+            pk=uuid4(),
+            event_date=datetime.utcnow(),
+            user_pk=user.pk,
+            user_agent=user_agent.string,
+            user_device_type=user_agent,
+        )
+        if session_writer.enabled and session_writer.put(session):
+            return session
+        return self.put(session)
+
+    def find_sessions(self, user_pk: UUID) -> Query:
+        """Запрос истории входов пользователя.
+
+        Args:
+            user_pk: ID пользователя
+
+        Returns:
+            Query: Запрос сессий пользователя без сортировки
         """
-        social_account = self.find_social_account(social_id, social_name)
-        if not social_account:
-            user = self.create_user(email=generate_random_email(8), password=generate_random_string(16))
-            social_account = self.create_social_account(user, social_id, social_name)
-            user.social_accounts.append(social_account)
-            self.put(user)
-            self.commit()
-        return social_account.user
+        return Session.query.filter(Session.user_pk == user_pk)
 
 
 security = Security()
+role_catalog = RoleCatalog(redis=redis_client, check_interval=CONFIG.cache.roles_check_interval_sec)
+RoleChangeTracker(role_catalog).watch(RoutingSession)
+social_accounts = SocialAccountCache(
+    redis=redis_client,
+    max_size=CONFIG.cache.principal_max_size,
+    ttl=CONFIG.cache.social_ttl_sec,
+)
 user_datastore = CustomUserDatastore(db, User, Role)
 
 
@@ -104,3 +333,6 @@ def install(app: Flask):
     """
     app.config['SECURITY_PASSWORD_SALT'] = CONFIG.flask.password_salt
     security.init_app(app, user_datastore)
+    role_catalog.clear()
+    if CONFIG.sessions.write_behind:
+        session_writer.start(app)
@@ -0,0 +1,288 @@
+import csv
+import io
+import json
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator, List, Optional, TextIO, Tuple
+
+from psycopg2.extras import RealDictCursor
+
+from apps.db import db
+from apps.security import role_catalog
+
+Progress = Callable[[int, Optional[float]], None]
+Batch = List[List[str]]
+
+
+class UserReader:
+    """Класс для потокового чтения пользователей из CSV или NDJSON.
+
+    Вместе с каждой записью возвращается смещение в байтах до ее конца, с которого чтение можно продолжить.
+    """
+
+    def __init__(self, stream: BinaryIO, file_format: str, offset: int = 0):
+        """При инициализации задается файл, его формат и смещение для продолжения чтения.
+
+        Args:
+            stream: Файл, открытый в двоичном режиме
+            file_format: Формат файла `csv` или `ndjson`
+            offset: Смещение в байтах, с которого нужно продолжить чтение
+        """
+        self.stream = stream
+        self.file_format = file_format
+        self.offset = offset
+
+    def __iter__(self) -> Iterator[Tuple[dict, int]]:
+        """Чтение записей.
+
+        Yields:
+            Tuple[dict, int]: Запись и смещение в байтах до ее конца
+        """
+        if self.file_format == 'ndjson':
+            self.stream.seek(self.offset)
+            for line in self._lines():
+                if line.strip():
+                    yield json.loads(line), self.offset
+            return
+        self.stream.seek(0)
+        header = self.stream.readline()
+        fieldnames = next(csv.reader([header.decode('utf-8-sig')]))
+        self.offset = max(self.offset, len(header))
+        self.stream.seek(self.offset)
+        for row in csv.DictReader(self._lines(), fieldnames=fieldnames):
+            yield row, self.offset
+
+    def _lines(self) -> Iterator[str]:
+        for line in self.stream:
+            self.offset += len(line)
+            yield line.decode('utf-8')
+
+
+class UserImporter:
+    """Класс для загрузки пользователей пачками через `COPY`.
+
+    Пароли принимаются уже в виде хэшей и не пересчитываются. Роли должны существовать заранее и назначаются в том же
+    запросе, что и вставка пользователей, только добавленным пользователям. После каждой пачки в файл контрольной точки
+    записывается смещение, с которого загрузка продолжится при повторном запуске. Пользователи с уже занятой почтой
+    или ID пропускаются, поэтому повтор пачки безопасен.
+    """
+
+    create_staging = '''
+        CREATE TEMPORARY TABLE import_users (
+            pk uuid, email varchar(255), password varchar(255), active boolean, roles text
+        ) ON COMMIT DROP
+    '''
+    copy_staging = 'COPY import_users (pk, email, password, active, roles) FROM STDIN WITH (FORMAT csv)'
+    insert_users = '''
+        WITH inserted AS (
+            INSERT INTO users (pk, email, password, active, token_generation)
+            SELECT pk, email, password, active, 0 FROM import_users
+            ON CONFLICT DO NOTHING
+            RETURNING pk
+        ), assigned AS (
+            INSERT INTO roles_users (user_pk, role_pk)
+            SELECT DISTINCT inserted.pk, roles.pk
+            FROM inserted
+            JOIN import_users ON import_users.pk = inserted.pk
+            CROSS JOIN LATERAL unnest(string_to_array(import_users.roles, %(separator)s)) AS role_name
+            JOIN roles ON roles.name = role_name
+            ON CONFLICT DO NOTHING
+        )
+        SELECT count(*) FROM inserted
+    '''
+
+    def __init__(self, batch_size: int, separator: str, progress: Progress):
+        """При инициализации задается размер пачки, разделитель ролей и функция вывода прогресса.
+
+        Args:
+            batch_size: Количество пользователей в пачке
+            separator: Разделитель ролей в CSV
+            progress: Функция, которая получает количество добавленных пользователей и процент прочитанного файла
+        """
+        self.batch_size = batch_size
+        self.separator = separator
+        self.progress = progress
+
+    def run(self, path: Path, file_format: str, checkpoint: Path) -> int:
+        """Загрузка пользователей из файла.
+
+        Args:
+            path: Путь к файлу
+            file_format: Формат файла `csv` или `ndjson`
+            checkpoint: Путь к файлу контрольной точки
+
+        Returns:
+            int: Количество добавленных пользователей
+        """
+        state = json.loads(checkpoint.read_text()) if checkpoint.exists() else {}
+        imported = state.get('imported', 0)
+        with path.open('rb') as stream:
+            for batch, offset in self.batches(UserReader(stream, file_format, state.get('offset', 0))):
+                imported += self.load(batch)
+                checkpoint.write_text(json.dumps({'offset': offset, 'imported': imported}))
+                self.progress(imported, offset * 100 / max(path.stat().st_size, 1))
+        checkpoint.unlink(missing_ok=True)
+        return imported
+
+    def batches(self, reader: UserReader) -> Iterator[Tuple[Batch, int]]:
+        """Разбиение записей из файла на пачки.
+
+        Args:
+            reader: Файл с пользователями
+
+        Yields:
+            Tuple[List[List[str]], int]: Строки для `COPY` и смещение в байтах до конца пачки
+        """
+        batch: Batch = []
+        for row, offset in reader:
+            batch.append(self.to_record(row))
+            if len(batch) == self.batch_size:
+                yield batch, offset
+                batch = []
+        if batch:
+            yield batch, reader.offset
+
+    def to_record(self, row: dict) -> List[str]:
+        """Приведение записи из файла к строке для `COPY`.
+
+        Args:
+            row: Запись из файла
+
+        Returns:
+            List[str]: Значения столбцов
+        """
+        roles = row.get('roles') or []
+        if not isinstance(roles, str):
+            roles = self.separator.join(roles)
+        active = row.get('active')
+        return [
+            row.get('pk') or str(uuid.uuid4()),
+            row['email'],
+            row.get('password') or '',
+            str(True if active in (None, '') else active).lower(),
+            roles,
+        ]
+
+    def check_roles(self, batch: Batch):
+        """Проверка, что все роли из пачки существуют.
+
+        Args:
+            batch: Строки для `COPY`
+
+        Raises:
+            ValueError: Ошибка с названиями несуществующих ролей
+        """
+        roles = {name for record in batch for name in record[-1].split(self.separator) if name}
+        unknown = roles - {role.name for role in role_catalog.all()}
+        if unknown:
+            raise ValueError('Роли не существуют: {0}'.format(', '.join(sorted(unknown))))
+
+    def load(self, batch: Batch) -> int:
+        """Загрузка пачки пользователей.
+
+        Args:
+            batch: Строки для `COPY`
+
+        Returns:
+            int: Количество добавленных пользователей
+        """
+        self.check_roles(batch)
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        with db.engine.begin() as connection:
+            cursor = connection.connection.cursor()
+            cursor.execute(self.create_staging)
+            cursor.copy_expert(self.copy_staging, buffer)
+            cursor.execute(self.insert_users, {'separator': self.separator})
+            return cursor.fetchone()[0]
+
+
+class UserExporter:
+    """Класс для выгрузки пользователей в CSV через `COPY` или в NDJSON через курсор на стороне сервера."""
+
+    query = '''
+        SELECT users.pk, users.email, users.password, users.active,
+               string_agg(roles.name, %(separator)s ORDER BY roles.name) AS roles
+        FROM users
+        LEFT JOIN roles_users ON roles_users.user_pk = users.pk
+        LEFT JOIN roles ON roles.pk = roles_users.role_pk
+        GROUP BY users.pk
+        ORDER BY users.pk
+    '''
+
+    def __init__(self, batch_size: int, separator: str, progress: Progress):
+        """При инициализации задается размер пачки, разделитель ролей и функция вывода прогресса.
+
+        Args:
+            batch_size: Количество пользователей, которые читаются из базы данных за раз
+            separator: Разделитель ролей
+            progress: Функция, которая получает количество выгруженных пользователей
+        """
+        self.batch_size = batch_size
+        self.separator = separator
+        self.progress = progress
+
+    def run(self, stream: TextIO, file_format: str) -> int:
+        """Выгрузка пользователей в файл.
+
+        Args:
+            stream: Файл, открытый в текстовом режиме
+            file_format: Формат файла `csv` или `ndjson`
+
+        Returns:
+            int: Количество выгруженных пользователей
+        """
+        export = self.export_csv if file_format == 'csv' else self.export_ndjson
+        with db.engine.begin() as connection:
+            exported = export(connection.connection, stream)
+        self.progress(exported, 100)
+        return exported
+
+    def export_csv(self, connection: Any, stream: TextIO) -> int:
+        """Выгрузка пользователей в CSV одним `COPY`.
+
+        Args:
+            connection: Соединение psycopg2
+            stream: Файл, открытый в текстовом режиме
+
+        Returns:
+            int: Количество выгруженных пользователей
+        """
+        cursor = connection.cursor()
+        query = cursor.mogrify(self.query, {'separator': self.separator}).decode('utf-8')
+        cursor.copy_expert(f'COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)', stream)
+        return cursor.rowcount
+
+    def export_ndjson(self, connection: Any, stream: TextIO) -> int:
+        """Выгрузка пользователей в NDJSON с чтением из базы данных пачками.
+
+        Args:
+            connection: Соединение psycopg2
+            stream: Файл, открытый в текстовом режиме
+
+        Returns:
+            int: Количество выгруженных пользователей
+        """
+        cursor = connection.cursor(name='export_users', cursor_factory=RealDictCursor)
+        cursor.itersize = self.batch_size
+        cursor.execute(self.query, {'separator': self.separator})
+        exported = 0
+        for user in cursor:
+            stream.write('{0}\n'.format(json.dumps(self.to_document(user), ensure_ascii=False)))
+            exported += 1
+            if exported % self.batch_size == 0:
+                self.progress(exported, None)
+        return exported
+
+    def to_document(self, user: dict) -> dict:
+        """Приведение строки из базы данных к записи NDJSON.
+
+        Args:
+            user: Строка из базы данных
+
+        Returns:
+            dict: Запись со списком ролей
+        """
+        roles = user.pop('roles')
+        return {**user, 'pk': str(user['pk']), 'roles': roles.split(self.separator) if roles else []}
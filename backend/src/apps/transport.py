@@ -0,0 +1,160 @@
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from werkzeug.exceptions import BadRequest, ServiceUnavailable
+
+from core.config import OAuthConfig
+
+
+class CircuitBreaker:
+    """Автоматический выключатель, который перестает пропускать запросы к провайдеру после серии ошибок.
+
+    Через `reset_timeout` секунд пропускается один пробный запрос: при успехе выключатель замыкается,
+    при ошибке снова размыкается на то же время.
+    """
+
+    def __init__(self, failures: int, reset_timeout: float):
+        """При инициализации задается порог ошибок и пауза перед пробным запросом.
+
+        Args:
+            failures: Количество ошибок подряд, после которого выключатель размыкается
+            reset_timeout: Пауза перед пробным запросом в секундах
+        """
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self._count = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def closed(self) -> bool:
+        """Признак того, что запросы пропускаются без ограничений.
+
+        Returns:
+            bool: Замкнут ли выключатель
+        """
+        return self._opened_at is None
+
+    def allow(self) -> bool:
+        """Проверка, можно ли выполнить запрос.
+
+        Returns:
+            bool: Можно ли выполнить запрос
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._opened_at = time.monotonic()
+            return True
+
+    def success(self):
+        """Учет успешного запроса."""
+        with self._lock:
+            self._count = 0
+            self._opened_at = None
+
+    def failure(self):
+        """Учет неудачного запроса."""
+        with self._lock:
+            self._count += 1
+            if self._count >= self.failures:
+                self._opened_at = time.monotonic()
+
+
+class OAuthTransport:
+    """HTTP-клиент провайдера OAuth.
+
+    Соединения переиспользуются из пула, у каждого запроса есть таймауты на подключение и чтение,
+    а количество одновременных запросов ограничено, чтобы медленный провайдер не занял все гринлеты воркера.
+    Повторяются только ошибки подключения и, для идемпотентных методов, ответы 502-504.
+    """
+
+    def __init__(self, name: str, config: OAuthConfig):
+        """При инициализации создается сессия с пулом соединений по настройкам провайдера.
+
+        Args:
+            name: Название провайдера
+            config: Настройки провайдера
+        """
+        self.name = name
+        self.timeout = (config.connect_timeout_sec, config.read_timeout_sec)
+        self.acquire_timeout = config.acquire_timeout_sec
+        self.breaker = CircuitBreaker(failures=config.breaker_failures, reset_timeout=config.breaker_reset_sec)
+        retry = Retry(
+            total=config.retries,
+            backoff_factor=config.backoff_factor,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._slots = threading.BoundedSemaphore(config.max_concurrency)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Выполнение запроса к провайдеру.
+
+        Args:
+            method: HTTP-метод
+            url: Адрес
+            kwargs: Параметры запроса для `requests`
+
+        Raises:
+            ServiceUnavailable: Ошибка, что провайдер не отвечает или выключатель разомкнут
+            BadRequest: Ошибка, что провайдер отклонил запрос
+
+        Returns:
+            requests.Response: Ответ провайдера
+        """
+        if not self.breaker.allow() or not self._slots.acquire(timeout=self.acquire_timeout):
+            raise ServiceUnavailable(f'Провайдер {self.name} временно недоступен!')
+        response = self._send(method, url, **kwargs)
+        if not response.ok:
+            raise BadRequest(f'Провайдер {self.name} отклонил запрос!')
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Выполнение GET-запроса к провайдеру.
+
+        Args:
+            url: Адрес
+            kwargs: Параметры запроса для `requests`
+
+        Returns:
+            requests.Response: Ответ провайдера
+        """
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Выполнение POST-запроса к провайдеру.
+
+        Args:
+            url: Адрес
+            kwargs: Параметры запроса для `requests`
+
+        Returns:
+            requests.Response: Ответ провайдера
+        """
+        return self.request('POST', url, **kwargs)
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        # Слот занимается в `request` и освобождается здесь после получения ответа
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as error:
+            self.breaker.failure()
+            raise ServiceUnavailable(f'Провайдер {self.name} временно недоступен!') from error
+        finally:
+            self._slots.release()
+        if response.status_code >= 500:
+            self.breaker.failure()
+            raise ServiceUnavailable(f'Провайдер {self.name} временно недоступен!')
+        self.breaker.success()
+        return response
@@ -1,4 +1,3 @@
-import json
 import string
 from secrets import choice
 
@@ -28,15 +27,3 @@ def generate_random_email(length: int, domain: str = 'yandex') -> str:
     """
     random_str = generate_random_string(length)
     return '{random_str}@{domain}.com'.format(random_str=random_str, domain=domain)
-
-
-def decode_json(payload: bytes) -> object:
-    """Функция для декодирования содержимого JSON в объект.
-
-    Args:
-        payload: Содержимое JSON в байтах
-
-    Returns:
-        object: Объект
-    """
-    return json.loads(payload.decode('utf-8'))
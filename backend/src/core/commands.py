@@ -0,0 +1,139 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from cryptography.hazmat.primitives.serialization import Encoding, NoEncryption, PrivateFormat
+from flask_script import Command, Option
+
+from apps.security import user_datastore as postgres
+from apps.transfer import UserExporter, UserImporter
+from core.config import CONFIG
+from models.session import PartitionManager, add_months
+
+
+class ManagePartitions(Command):
+    """Команда для создания будущих партиций истории входов и удаления устаревших."""
+
+    option_list = (
+        Option('--premake', dest='premake', type=int, default=CONFIG.sessions.premake_months),
+        Option('--retention', dest='retention', type=int, default=CONFIG.sessions.retention_months),
+        Option('--detach-only', dest='detach_only', action='store_true', default=CONFIG.sessions.detach_only),
+    )
+
+    def run(self, premake: int, retention: int, detach_only: bool):
+        """Скрипт запуска команды.
+
+        Args:
+            premake: На сколько месяцев вперед создать партиции
+            retention: Сколько месяцев хранить историю входов
+            detach_only: Только отсоединить устаревшие партиции, не удаляя их
+        """
+        today = datetime.utcnow().date()
+        with postgres.db.engine.begin() as connection:
+            manager = PartitionManager(connection)
+            created = manager.create(today, add_months(today, premake))
+            expired = manager.expire(add_months(today, -retention), detach_only=detach_only)
+        print('Созданы партиции: {0}'.format(', '.join(created)))  # noqa: WPS421
+        print('Устаревшие партиции: {0}'.format(', '.join(expired) or '-'))  # noqa: WPS421
+
+
+class GenerateKey(Command):
+    """Команда для создания ключа подписи токенов в директории ключей."""
+
+    option_list = (
+        Option('--kid', dest='kid', required=True),
+    )
+
+    def run(self, kid: str):
+        """Скрипт запуска команды.
+
+        Args:
+            kid: ID ключа
+        """
+        key: Union[ed25519.Ed25519PrivateKey, ec.EllipticCurvePrivateKey, rsa.RSAPrivateKey]
+        if CONFIG.jwt.algorithm == 'EdDSA':
+            key = ed25519.Ed25519PrivateKey.generate()
+        elif CONFIG.jwt.algorithm.startswith('ES'):
+            key = ec.generate_private_key(ec.SECP256R1())
+        else:
+            key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        path = Path(CONFIG.jwt.keys_dir) / f'{kid}.pem'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(key.private_bytes(Encoding.PEM, PrivateFormat.PKCS8, NoEncryption()))
+        path.chmod(0o600)
+        print(f'Создан ключ {path}')  # noqa: WPS421
+
+
+def print_progress(count: int, percent: Optional[float]):
+    """Вывод прогресса импорта или экспорта пользователей.
+
+    Args:
+        count: Количество обработанных пользователей
+        percent: Процент выполнения, если он известен
+    """
+    suffix = '' if percent is None else f' ({percent:.1f}%)'
+    print(f'Обработано пользователей: {count}{suffix}', flush=True)  # noqa: WPS421
+
+
+def file_format(path: Path, default: Optional[str]) -> str:
+    """Определение формата файла с пользователями.
+
+    Args:
+        path: Путь к файлу
+        default: Формат, указанный явно
+
+    Returns:
+        str: Формат файла `csv` или `ndjson`
+    """
+    if default:
+        return default
+    return 'ndjson' if path.suffix in {'.ndjson', '.jsonl'} else 'csv'
+
+
+class ImportUsers(Command):
+    """Команда для загрузки пользователей из CSV или NDJSON с захэшированными паролями."""
+
+    option_list = (
+        Option('path', type=Path),
+        Option('--format', dest='fmt', choices=('csv', 'ndjson')),
+        Option('--checkpoint', dest='checkpoint', type=Path),
+        Option('--batch-size', dest='batch_size', type=int, default=CONFIG.transfer.batch_size),
+    )
+
+    def run(self, path: Path, fmt: Optional[str], checkpoint: Optional[Path], batch_size: int):
+        """Скрипт запуска команды.
+
+        Args:
+            path: Путь к файлу
+            fmt: Формат файла, по умолчанию определяется по расширению
+            checkpoint: Путь к файлу контрольной точки, по умолчанию рядом с файлом
+            batch_size: Количество пользователей в пачке
+        """
+        importer = UserImporter(batch_size, CONFIG.transfer.roles_separator, print_progress)
+        checkpoint = checkpoint or path.with_name(f'{path.name}.checkpoint')
+        imported = importer.run(path, file_format(path, fmt), checkpoint)
+        print(f'Добавлено пользователей: {imported}')  # noqa: WPS421
+
+
+class ExportUsers(Command):
+    """Команда для выгрузки пользователей с хэшами паролей и ролями в CSV или NDJSON."""
+
+    option_list = (
+        Option('path', type=Path),
+        Option('--format', dest='fmt', choices=('csv', 'ndjson')),
+        Option('--batch-size', dest='batch_size', type=int, default=CONFIG.transfer.batch_size),
+    )
+
+    def run(self, path: Path, fmt: Optional[str], batch_size: int):
+        """Скрипт запуска команды.
+
+        Args:
+            path: Путь к файлу
+            fmt: Формат файла, по умолчанию определяется по расширению
+            batch_size: Количество пользователей, которые читаются из базы данных за раз
+        """
+        exporter = UserExporter(batch_size, CONFIG.transfer.roles_separator, print_progress)
+        with path.open('w', encoding='utf-8', newline='') as stream:
+            exported = exporter.run(stream, file_format(path, fmt))
+        print(f'Выгружено пользователей: {exported}')  # noqa: WPS421
@@ -1,6 +1,34 @@
 from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
-from pydantic import BaseSettings, Field
+from pydantic import BaseSettings, Field, validator
+from pydantic.env_settings import EnvSettingsSource, SettingsSourceCallable
+from pydantic.fields import ModelField
+
+
+class GroupedEnvSettingsSource(EnvSettingsSource):
+    """Источник настроек из переменных окружения, в названиях которых разделитель отделяет только группу настроек.
+
+    Так `JWT_KEYS_DIR` попадает в поле `keys_dir` группы `jwt`, а не в несуществующую группу `keys`.
+    """
+
+    def explode_env_vars(self, field: ModelField, env_vars: Mapping[str, Optional[str]]) -> Dict[str, Any]:
+        """Отбор переменных окружения, которые относятся к группе настроек.
+
+        Args:
+            field: Поле с группой настроек
+            env_vars: Переменные окружения
+
+        Returns:
+            Dict[str, Any]: Значения по названиям полей группы
+        """
+        group: Dict[str, Any] = {}
+        for env_name in field.field_info.extra['env_names']:
+            prefix = f'{env_name}{self.env_nested_delimiter}'
+            group.update({
+                name[len(prefix):]: env_value for name, env_value in env_vars.items() if name.startswith(prefix)
+            })
+        return group
 
 
 class PostgresConfig(BaseSettings):
@@ -11,6 +39,28 @@ class PostgresConfig(BaseSettings):
     db: str = 'users_database'
     user: str = 'postgres'
     password: str = 'postgres'
+    dsn: str = ''
+    replicas: List[str] = []
+    pool_size: int = 20
+    max_overflow: int = 10
+    pool_timeout_sec: int = 5
+    pool_recycle_sec: int = 30 * 60
+    pool_pre_ping: bool = True
+    statement_timeout_ms: int = 5000
+
+    @validator('replicas', pre=True)
+    def split_replicas(cls, replicas: Any) -> Any:
+        """Разбор списка реплик, который в переменной окружения задается через запятую.
+
+        Args:
+            replicas: Список реплик или строка с адресами через запятую
+
+        Returns:
+            Any: Список реплик
+        """
+        if isinstance(replicas, str):
+            return [replica.strip() for replica in replicas.split(',') if replica.strip()]
+        return replicas
 
 
 class RedisConfig(BaseSettings):
@@ -18,6 +68,21 @@ class RedisConfig(BaseSettings):
 
     host: str = '127.0.0.1'
     port: int = 6379
+    max_connections: int = 50
+    pool_timeout_sec: float = 1.0
+    socket_timeout_sec: float = 5.0
+    connect_timeout_sec: float = 1.0
+    health_check_interval_sec: int = 30
+
+
+class BlocklistConfig(BaseSettings):
+    """Класс с настройками фильтра отозванных токенов."""
+
+    enabled: bool = True
+    stream: str = 'revoked_tokens'
+    capacity: int = 100000
+    error_rate: float = 0.001
+    block_ms: int = 1000
 
 
 class FlaskConfig(BaseSettings):
@@ -32,6 +97,56 @@ class FlaskConfig(BaseSettings):
     secret_key: str = 'secret_key'
     password_salt: str = ''
     date_format: str = '%d/%m/%Y %H:%M:%S'
+    bulk_max_size: int = 50000
+    trusted_proxies: int = 1
+
+
+class JwtConfig(BaseSettings):
+    """Класс с настройками подписи JWT токенов."""
+
+    algorithm: str = 'HS256'
+    keys_dir: str = ''
+    active_kid: str = ''
+    jwks_max_age_sec: int = 5 * 60
+    introspection_batch: int = 100
+    compact_refresh: bool = False
+
+
+class CacheConfig(BaseSettings):
+    """Класс с настройками кэширования."""
+
+    principal_ttl_sec: int = 5 * 60
+    principal_local_ttl_sec: int = 5
+    principal_max_size: int = 10000
+    roles_check_interval_sec: float = 1.0
+    http_max_age_sec: int = 30
+    social_ttl_sec: int = 24 * 60 * 60
+
+
+class HashingConfig(BaseSettings):
+    """Класс с настройками пула потоков для хэширования паролей."""
+
+    workers: int = 4
+
+
+class SessionsConfig(BaseSettings):
+    """Класс с настройками записи истории входов."""
+
+    write_behind: bool = False
+    batch_size: int = 500
+    flush_interval_sec: float = 1.0
+    queue_size: int = 10000
+    write_retries: int = 3
+    premake_months: int = 3
+    retention_months: int = 12
+    detach_only: bool = False
+
+
+class TransferConfig(BaseSettings):
+    """Класс с настройками импорта и экспорта пользователей."""
+
+    batch_size: int = 10000
+    roles_separator: str = '|'
 
 
 class OAuthConfig(BaseSettings):
@@ -39,6 +154,58 @@ class OAuthConfig(BaseSettings):
 
     id: str = ''
     secret: str = ''
+    authorize_url: str = ''
+    token_url: str = ''
+    userinfo_url: str = ''
+    discovery_url: str = ''
+    discovery_ttl_sec: int = 24 * 60 * 60
+    scope: str = ''
+    user_id_field: str = 'id'
+    auth_scheme: str = 'Bearer'
+    pool_size: int = 10
+    connect_timeout_sec: float = 2.0
+    read_timeout_sec: float = 5.0
+    retries: int = 2
+    backoff_factor: float = 0.2
+    max_concurrency: int = 20
+    acquire_timeout_sec: float = 1.0
+    breaker_failures: int = 5
+    breaker_reset_sec: float = 30.0
+
+
+class YandexConfig(OAuthConfig):
+    """Класс с настройками для подключения к Yandex."""
+
+    authorize_url: str = 'https://oauth.yandex.com/authorize'
+    token_url: str = 'https://oauth.yandex.com/token'
+    userinfo_url: str = 'https://login.yandex.ru/info'
+    auth_scheme: str = 'OAuth'
+
+
+class VkConfig(OAuthConfig):
+    """Класс с настройками для подключения к VK, который возвращает ID пользователя вместе с токеном."""
+
+    authorize_url: str = 'https://oauth.vk.com/authorize'
+    token_url: str = 'https://oauth.vk.com/access_token'
+    user_id_field: str = 'user_id'
+
+
+class GoogleConfig(OAuthConfig):
+    """Класс с настройками для подключения к Google, адреса которого берутся из документа OpenID Connect."""
+
+    discovery_url: str = 'https://accounts.google.com/.well-known/openid-configuration'
+    scope: str = 'openid'
+    user_id_field: str = 'sub'
+
+
+class LimiterConfig(BaseSettings):
+    """Класс с настройками ограничения количества запросов."""
+
+    storage: str = ''
+    strategy: str = 'moving-window'
+    default: str = '10/second'
+    sessions: str = '5/second'
+    introspection: str = '200/second'
 
 
 class JaegerConfig(BaseSettings):
@@ -47,6 +214,24 @@ class JaegerConfig(BaseSettings):
     host: str = '127.0.0.1'
     port: int = 6831
     enabled: bool = False
+    exporter: str = 'jaeger'
+    otlp_endpoint: str = 'http://127.0.0.1:4318/v1/traces'
+    sample_ratio: float = 0.1
+    tail_slow_ms: int = 0
+    tail_errors: bool = False
+    max_queue_size: int = 2048
+    max_export_batch_size: int = 512
+    schedule_delay_ms: int = 5000
+    export_timeout_ms: int = 30000
+    instrument_sqlalchemy: bool = True
+    instrument_redis: bool = True
+
+
+class MetricsConfig(BaseSettings):
+    """Класс с настройками выгрузки метрик Prometheus."""
+
+    enabled: bool = True
+    endpoint: str = '/metrics'
 
 
 class LogstashConfig(BaseSettings):
@@ -60,12 +245,49 @@ class MainSettings(BaseSettings):
     """Класс с основными настройками проекта."""
 
     flask: FlaskConfig = Field(default_factory=FlaskConfig)
+    jwt: JwtConfig = Field(default_factory=JwtConfig)
     redis: RedisConfig = Field(default_factory=RedisConfig)
+    blocklist: BlocklistConfig = Field(default_factory=BlocklistConfig)
     postgres: PostgresConfig = Field(default_factory=PostgresConfig)
-    yandex: OAuthConfig = Field(default_factory=OAuthConfig)
-    vk: OAuthConfig = Field(default_factory=OAuthConfig)
+    cache: CacheConfig = Field(default_factory=CacheConfig)
+    hashing: HashingConfig = Field(default_factory=HashingConfig)
+    sessions: SessionsConfig = Field(default_factory=SessionsConfig)
+    transfer: TransferConfig = Field(default_factory=TransferConfig)
+    yandex: YandexConfig = Field(default_factory=YandexConfig)
+    vk: VkConfig = Field(default_factory=VkConfig)
+    google: GoogleConfig = Field(default_factory=GoogleConfig)
+    limiter: LimiterConfig = Field(default_factory=LimiterConfig)
     jaeger: JaegerConfig = Field(default_factory=JaegerConfig)
     logstash: LogstashConfig = Field(default_factory=LogstashConfig)
+    metrics: MetricsConfig = Field(default_factory=MetricsConfig)
+
+    class Config:
+        """Настройки источников, в которых переменные окружения разбираются по группам."""
+
+        @classmethod
+        def customise_sources(
+            cls,
+            init_settings: SettingsSourceCallable,
+            env_settings: EnvSettingsSource,
+            file_secret_settings: SettingsSourceCallable,
+        ) -> Tuple[SettingsSourceCallable, ...]:
+            """Замена источника переменных окружения.
+
+            Args:
+                init_settings: Источник параметров инициализации
+                env_settings: Источник переменных окружения
+                file_secret_settings: Источник секретов из файлов
+
+            Returns:
+                Tuple[SettingsSourceCallable, ...]: Источники в порядке приоритета
+            """
+            grouped_env_settings = GroupedEnvSettingsSource(
+                env_file=env_settings.env_file,
+                env_file_encoding=env_settings.env_file_encoding,
+                env_nested_delimiter=env_settings.env_nested_delimiter,
+                env_prefix_len=env_settings.env_prefix_len,
+            )
+            return init_settings, grouped_env_settings, file_secret_settings
 
 
 @lru_cache()
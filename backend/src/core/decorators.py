@@ -1,11 +1,20 @@
+import hashlib
 from functools import wraps
-from typing import Callable
+from http import HTTPStatus
+from secrets import choice
+from typing import Callable, Optional, Type
 
+from flask import current_app, g, request
 from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from marshmallow import Schema
+from webargs.flaskparser import parser
+from werkzeug import Response
 from werkzeug.exceptions import Forbidden
 
 from core.enums import AuthRoles
 
+ETagFunction = Callable[..., Optional[str]]
+
 
 def admin_required(view: Callable) -> Callable:
     """
@@ -25,3 +34,109 @@ def admin_required(view: Callable) -> Callable:
             raise Forbidden('Доступно только для админов')
         return view(*args, **kwargs)
     return wrapper
+
+
+def read_replica(view: Callable) -> Callable:
+    """
+    Декоратор для выполнения запросов ресурса к случайной реплике базы данных, если они заданы.
+
+    Args:
+        view: Функция для представления ресурса
+
+    Returns:
+        Callable: Декорируемая функция
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        replicas = current_app.config.get('SQLALCHEMY_REPLICAS')
+        if replicas:
+            g.read_replica = choice(replicas)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def view_response(view: Callable, etag: Optional[str], *args, **kwargs) -> Response:
+    """Функция для выполнения ресурса, если ETag не совпал с заголовком `If-None-Match`.
+
+    Args:
+        view: Функция для представления ресурса
+        etag: ETag, вычисленный до выполнения ресурса
+        args: Позиционные аргументы ресурса
+        kwargs: Именованные аргументы ресурса
+
+    Returns:
+        Response: Ответ ресурса или пустой ответ, который станет ответом 304
+    """
+    if etag and request.if_none_match.contains(etag):
+        return current_app.response_class()
+    return current_app.make_response(view(*args, **kwargs))
+
+
+def tag_response(response: Response, etag: Optional[str]) -> Response:
+    """Функция для установки ETag и ответа 304, если он совпал с заголовком `If-None-Match`.
+
+    Args:
+        response: Ответ
+        etag: ETag или None, если его нужно вычислить как хэш тела ответа
+
+    Returns:
+        Response: Ответ с ETag
+    """
+    response.set_etag(etag or hashlib.sha256(response.get_data()).hexdigest()[:32])
+    return response.make_conditional(request)
+
+
+def cache_response(response: Response, max_age: int, public: bool) -> Response:
+    """Функция для установки заголовков кэширования ответа.
+
+    Args:
+        response: Ответ
+        max_age: Время кэширования ответа в секундах
+        public: Можно ли кэшировать ответ на прокси-серверах
+
+    Returns:
+        Response: Ответ с заголовком `Cache-Control`
+    """
+    if public:
+        response.cache_control.public = True
+    else:
+        response.cache_control.private = True
+        response.vary.add('Authorization')
+    response.cache_control.max_age = max_age
+    return response
+
+
+def conditional(
+    etag: Optional[ETagFunction] = None,
+    max_age: int = 0,
+    public: bool = False,
+    query: Optional[Type[Schema]] = None,
+) -> Callable:
+    """
+    Декоратор для поддержки условных запросов по заголовку `If-None-Match`.
+
+    Если передана функция `etag`, то ETag вычисляется до выполнения ресурса, и при совпадении ответ 304 отдается сразу.
+    Иначе, а также если функция вернула None, ETag вычисляется как хэш тела ответа.
+    Схема `query` проверяется до сравнения ETag, чтобы некорректный запрос не получил ответ 304.
+
+    Args:
+        etag: Функция, которая по параметрам из адреса ресурса возвращает ETag
+        max_age: Время кэширования ответа в секундах
+        public: Можно ли кэшировать ответ на прокси-серверах
+        query: Схема параметров строки запроса
+
+    Returns:
+        Callable: Декоратор
+    """
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if query:
+                parser.parse(query, location='query')
+            value = etag(**kwargs) if etag else None
+            response = view_response(view, value, *args, **kwargs)
+            if response.status_code != HTTPStatus.OK:
+                return response
+            return cache_response(tag_response(response, value), max_age, public)
+        return wrapper
+    return decorator
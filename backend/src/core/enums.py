@@ -14,3 +14,4 @@ class OAuthProviders(Enum):
 
     YANDEX = 'yandex'
     VK = 'vk'
+    GOOGLE = 'google'
@@ -0,0 +1,11 @@
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    """Хук gunicorn, который удаляет метрики-гейджи завершившегося воркера из каталога метрик.
+
+    Args:
+        server: Арбитр gunicorn
+        worker: Завершившийся воркер
+    """
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,12 +1,15 @@
 import logging
+import sys
 
 import flask_migrate
 from flask import Flask, g, request
 from flask_script import Command, Manager, prompt
 from logstash import LogstashHandler
+from werkzeug.middleware.proxy_fix import ProxyFix
 
-from apps import api, db, jaeger, jwt, limiter, oauth, security
+from apps import api, db, jaeger, jwt, limiter, metrics, oauth, security
 from apps.security import user_datastore as postgres
+from core.commands import ExportUsers, GenerateKey, ImportUsers, ManagePartitions
 from core.config import CONFIG
 
 
@@ -26,22 +29,30 @@ class RequestIdFilter(logging.Filter):
         return True
 
 
-def create_app() -> Flask:
+def create_app(load_keys: bool = True) -> Flask:
     """Инициализация приложения.
 
+    Args:
+        load_keys: Загружать ли ключи подписи токенов, без которых при асимметричной подписи приложение не запускается
+
     Returns:
         Flask: Приложение
     """
     app = Flask(__name__)
+    # Запросы приходят через nginx, поэтому адрес клиента для ограничения запросов берется из X-Forwarded-For
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=CONFIG.flask.trusted_proxies)  # type: ignore[method-assign]
     app.logger = logging.getLogger(__name__)
     app.logger.setLevel(logging.INFO)
     app.logger.addFilter(RequestIdFilter())
     app.logger.addHandler(LogstashHandler(CONFIG.logstash.host, CONFIG.logstash.port, version=1))
     db.install(app)
     jwt.install(app)
+    if load_keys:
+        jwt.load_keys()
     security.install(app)
     api.install(app)
     oauth.install(app)
+    metrics.install(app)
     limiter.install(app)
     jaeger.install(app)
     return app
@@ -78,8 +89,13 @@ class CreateSuperUser(Command):
 
 
 if __name__ == '__main__':
-    manager = Manager(app=create_app())
+    # Первый ключ подписи создается командой generatekey, поэтому для нее ключи не загружаются
+    manager = Manager(app=create_app(load_keys=sys.argv[1:2] != ['generatekey']))
     manager.add_command('makemigrations', MakeMigrations())
     manager.add_command('migrate', Migrate())
     manager.add_command('createsuperuser', CreateSuperUser())
+    manager.add_command('partitions', ManagePartitions())
+    manager.add_command('generatekey', GenerateKey())
+    manager.add_command('import-users', ImportUsers())
+    manager.add_command('export-users', ExportUsers())
     manager.run()
@@ -0,0 +1,23 @@
+"""sessions user history index
+
+Revision ID: 3b9d2f61c4a7
+Revises: 6e67d1cb57cf
+Create Date: 2026-10-17 10:12:41.508213
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3b9d2f61c4a7'
+down_revision = '6e67d1cb57cf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Индекс на партицированной таблице создается в каждой партиции
+    op.create_index('ix_sessions_user_pk_event_date', 'sessions', ['user_pk', 'event_date', 'pk'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_sessions_user_pk_event_date', table_name='sessions')
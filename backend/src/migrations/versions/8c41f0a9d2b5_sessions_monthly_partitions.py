@@ -0,0 +1,70 @@
+"""sessions monthly partitions
+
+Revision ID: 8c41f0a9d2b5
+Revises: 3b9d2f61c4a7
+Create Date: 2026-10-17 12:40:03.117524
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+from models.session import PartitionManager, add_months
+from core.config import CONFIG
+
+# revision identifiers, used by Alembic.
+revision = '8c41f0a9d2b5'
+down_revision = '3b9d2f61c4a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Ключ партицирования по дате должен входить в первичный ключ
+    op.execute("UPDATE sessions SET event_date = timezone('utc', now()) WHERE event_date IS NULL")
+    op.alter_column('sessions', 'event_date', existing_type=sa.DateTime(), nullable=False)
+    op.drop_constraint('sessions_pk_user_device_type_key', 'sessions', type_='unique')
+    op.drop_constraint('sessions_pkey', 'sessions', type_='primary')
+    op.create_primary_key('sessions_pkey', 'sessions', ['pk', 'event_date', 'user_device_type'])
+
+    # Партиции по устройствам пересоздаются с разбиением по месяцам, а данные переносятся из старых
+    for device_type in PartitionManager.device_types:
+        op.execute(f'ALTER TABLE "sessions" DETACH PARTITION "sessions_{device_type}"')
+        op.execute(f'ALTER TABLE "sessions_{device_type}" RENAME TO "sessions_{device_type}_legacy"')
+        op.execute(f"""
+            CREATE TABLE "sessions_{device_type}" PARTITION OF "sessions" FOR VALUES IN ('{device_type}')
+            PARTITION BY RANGE (event_date)
+        """)
+        op.execute(f'CREATE TABLE "sessions_{device_type}_default" PARTITION OF "sessions_{device_type}" DEFAULT')
+
+    connection = op.get_bind()
+    first_date = connection.execute(sa.text(' UNION ALL '.join(
+        f'SELECT min(event_date) FROM "sessions_{device_type}_legacy"'
+        for device_type in PartitionManager.device_types
+    ))).scalars().all()
+    today = datetime.utcnow().date()
+    start = min((day.date() for day in first_date if day), default=today)
+    PartitionManager(connection).create(start, add_months(today, CONFIG.sessions.premake_months))
+
+    for device_type in PartitionManager.device_types:
+        op.execute(f'INSERT INTO "sessions" SELECT * FROM "sessions_{device_type}_legacy"')
+        op.execute(f'DROP TABLE "sessions_{device_type}_legacy"')
+
+
+def downgrade():
+    for device_type in PartitionManager.device_types:
+        op.execute(f'ALTER TABLE "sessions" DETACH PARTITION "sessions_{device_type}"')
+        op.execute(f'ALTER TABLE "sessions_{device_type}" RENAME TO "sessions_{device_type}_monthly"')
+        op.execute(f"""
+            CREATE TABLE "sessions_{device_type}" PARTITION OF "sessions" FOR VALUES IN ('{device_type}')
+        """)
+
+    op.drop_constraint('sessions_pkey', 'sessions', type_='primary')
+    op.create_primary_key('sessions_pkey', 'sessions', ['pk', 'user_device_type'])
+    op.create_unique_constraint('sessions_pk_user_device_type_key', 'sessions', ['pk', 'user_device_type'])
+    op.alter_column('sessions', 'event_date', existing_type=sa.DateTime(), nullable=True)
+
+    for device_type in PartitionManager.device_types:
+        op.execute(f'INSERT INTO "sessions" SELECT * FROM "sessions_{device_type}_monthly"')
+        op.execute(f'DROP TABLE "sessions_{device_type}_monthly"')
@@ -0,0 +1,23 @@
+"""users token generation
+
+Revision ID: d5e7a3c19b42
+Revises: 8c41f0a9d2b5
+Create Date: 2026-10-17 15:21:37.640195
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd5e7a3c19b42'
+down_revision = '8c41f0a9d2b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('token_generation', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    op.drop_column('users', 'token_generation')
@@ -0,0 +1,34 @@
+"""roles users primary key
+
+Revision ID: f2a64c8e1d37
+Revises: d5e7a3c19b42
+Create Date: 2026-10-17 18:04:52.917362
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'f2a64c8e1d37'
+down_revision = 'd5e7a3c19b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Перед созданием первичного ключа удаляются повторные назначения одной роли
+    op.execute(
+        '''
+        DELETE FROM roles_users AS duplicate
+        USING roles_users AS original
+        WHERE duplicate.user_pk = original.user_pk
+            AND duplicate.role_pk = original.role_pk
+            AND duplicate.ctid > original.ctid
+        ''',
+    )
+    op.create_primary_key('roles_users_pkey', 'roles_users', ['user_pk', 'role_pk'])
+    op.create_index('ix_roles_users_role_pk', 'roles_users', ['role_pk'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_roles_users_role_pk', table_name='roles_users')
+    op.drop_constraint('roles_users_pkey', 'roles_users', type_='primary')
@@ -39,12 +39,13 @@ roles_users = db.Table(
         'user_pk',
         UUID(as_uuid=True),
         db.ForeignKey('users.pk', ondelete='CASCADE'),
-        nullable=False,
+        primary_key=True,
     ),
     db.Column(
         'role_pk',
         UUID(as_uuid=True),
         db.ForeignKey('roles.pk', ondelete='CASCADE'),
-        nullable=False,
+        primary_key=True,
     ),
+    db.Index('ix_roles_users_role_pk', 'role_pk'),
 )
@@ -1,5 +1,7 @@
+import re
 import uuid
-from datetime import datetime
+from datetime import date, datetime
+from typing import List, Optional, Tuple
 
 from sqlalchemy import Table, text
 from sqlalchemy.dialects.postgresql import UUID
@@ -23,6 +25,7 @@ class Session(db.Model):  # type: ignore[name-defined]
     )
     event_date = db.Column(
         db.DateTime,
+        primary_key=True,
         default=datetime.utcnow,
     )
     user_pk = db.Column(
@@ -33,6 +36,10 @@ class Session(db.Model):  # type: ignore[name-defined]
     user_agent = db.Column(db.String)
     user_device_type = db.Column(db.Text, primary_key=True)
 
+    __table_args__ = (
+        db.Index('ix_sessions_user_pk_event_date', 'user_pk', 'event_date', 'pk'),
+    )
+
     @validates('user_device_type')
     def validate_user_device_type(self, key: str, value: UserAgent) -> str:
         """Парсит данные `User-agent` и определяет с какого устройства вошёл пользователь.
@@ -76,3 +83,164 @@ def create_partition(target: Table, connection: Connection, **kwargs) -> None:
     connection.execute(statement=text(text="""
         CREATE TABLE IF NOT EXISTS "sessions_other" PARTITION OF "sessions" FOR VALUES IN ('other')
     """))
+
+
+def add_months(day: date, months: int) -> date:
+    """Функция для получения первого дня месяца, отстоящего от заданной даты на несколько месяцев.
+
+    Args:
+        day: Дата
+        months: Количество месяцев
+
+    Returns:
+        date: Первое число месяца
+    """
+    years, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + years, month + 1, 1)
+
+
+MONTH_PATTERN = re.compile(r'_y(?P<year>\d{4})m(?P<month>\d{2})$')
+
+
+def partition_name(device_type: str, month: date) -> str:
+    """Функция для получения названия помесячной партиции.
+
+    Args:
+        device_type: Тип устройства
+        month: Первое число месяца
+
+    Returns:
+        str: Название партиции
+    """
+    return 'sessions_{device}_y{year}m{month:02d}'.format(device=device_type, year=month.year, month=month.month)
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Функция для получения месяца помесячной партиции по ее названию.
+
+    Args:
+        name: Название партиции
+
+    Returns:
+        Optional[date]: Первое число месяца или None, если партиция не помесячная
+    """
+    match = MONTH_PATTERN.search(name)
+    if match is None:
+        return None
+    return date(int(match.group('year')), int(match.group('month')), 1)
+
+
+class PartitionManager:
+    """Класс для управления помесячными партициями истории входов внутри партиций по устройствам."""
+
+    device_types = ('pc', 'tablet', 'mobile', 'other')
+
+    def __init__(self, connection: Connection):
+        """При инициализации задается соединение с БД.
+
+        Args:
+            connection: Соединение с БД
+        """
+        self.connection = connection
+
+    def create(self, start: date, end: date) -> List[str]:
+        """Создание партиций на каждый месяц в заданном промежутке.
+
+        Args:
+            start: Дата начала
+            end: Дата окончания
+
+        Returns:
+            List[str]: Названия партиций
+        """
+        created: List[str] = []
+        month = start.replace(day=1)
+        while month <= end:
+            created.extend(self.create_month(device_type, month) for device_type in self.device_types)
+            month = add_months(month, 1)
+        return created
+
+    def create_month(self, device_type: str, month: date) -> str:
+        """Создание партиции на месяц, если ее еще нет.
+
+        Партиция создается отдельной таблицей и присоединяется после того, как в нее перенесены строки этого месяца
+        из партиции по умолчанию. Иначе, если создание партиции было пропущено и строки попали в партицию
+        по умолчанию, присоединение завершилось бы ошибкой.
+
+        Args:
+            device_type: Тип устройства
+            month: Первое число месяца
+
+        Returns:
+            str: Название партиции
+        """
+        parent = f'sessions_{device_type}'
+        name = partition_name(device_type, month)
+        if name in self.partitions(parent):
+            return name
+        next_month = add_months(month, 1)
+        self.connection.execute(statement=text(
+            text=f'CREATE TABLE "{name}" (LIKE "{parent}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        ))
+        self.connection.execute(statement=text(text=f"""
+            WITH moved AS (
+                DELETE FROM "{parent}_default" WHERE event_date >= :start AND event_date < :end RETURNING *
+            )
+            INSERT INTO "{name}" SELECT * FROM moved
+        """).bindparams(start=month, end=next_month))
+        self.connection.execute(statement=text(text=f"""
+            ALTER TABLE "{parent}" ATTACH PARTITION "{name}" FOR VALUES FROM ('{month}') TO ('{next_month}')
+        """))
+        return name
+
+    def expire(self, before: date, detach_only: bool = False) -> List[str]:
+        """Отсоединение и удаление партиций, которые целиком старше заданной даты.
+
+        Args:
+            before: Дата, до которой данные больше не хранятся
+            detach_only: Только отсоединить партиции, не удаляя их
+
+        Returns:
+            List[str]: Названия партиций
+        """
+        expired = self.find_expired(before)
+        for parent, name in expired:
+            self.connection.execute(statement=text(text=f'ALTER TABLE "{parent}" DETACH PARTITION "{name}"'))
+            if not detach_only:
+                self.connection.execute(statement=text(text=f'DROP TABLE "{name}"'))
+        return [partition for _, partition in expired]
+
+    def find_expired(self, before: date) -> List[Tuple[str, str]]:
+        """Поиск помесячных партиций, которые целиком старше заданной даты.
+
+        Args:
+            before: Дата, до которой данные больше не хранятся
+
+        Returns:
+            List[Tuple[str, str]]: Пары из названий партицированной таблицы и ее партиции
+        """
+        expired = []
+        for device_type in self.device_types:
+            parent = f'sessions_{device_type}'
+            for name in self.partitions(parent):
+                month = partition_month(name)
+                if month is not None and add_months(month, 1) <= before:
+                    expired.append((parent, name))
+        return expired
+
+    def partitions(self, parent: str) -> List[str]:
+        """Названия партиций таблицы.
+
+        Args:
+            parent: Название партицированной таблицы
+
+        Returns:
+            List[str]: Названия партиций
+        """
+        rows = self.connection.execute(statement=text(text="""
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+        """).bindparams(parent=parent))
+        return sorted(rows.scalars())
@@ -1,10 +1,10 @@
 import uuid
 
-from flask_security.utils import hash_password
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import validates
 
 from apps.db import db
+from apps.hashing import password_hasher
 from models.role import roles_users
 
 
@@ -29,6 +29,12 @@ class User(db.Model):  # type: ignore[name-defined]
     active = db.Column(
         db.Boolean(),
     )
+    token_generation = db.Column(
+        db.Integer(),
+        nullable=False,
+        default=0,
+        server_default='0',
+    )
     roles = db.relationship(
         'Role',
         secondary=roles_users,
@@ -53,7 +59,7 @@ class User(db.Model):  # type: ignore[name-defined]
         Returns:
             str: Пароль в виде хэша
         """
-        return hash_password(value)
+        return password_hasher.hash(value)
 
 
 class SocialAccount(db.Model):  # type: ignore[name-defined]
@@ -0,0 +1,235 @@
+"""Бенчмарк горячих путей сервиса авторизации.
+
+Приложение запускается через `create_app()` на SQLite и fakeredis, запросы выполняются через тестовый клиент WSGI
+из нескольких потоков. Результат в формате JSON содержит задержки p50/p95/p99 и RPS по каждой ручке
+и подходит для сравнения коммитов между собой.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'backend' / 'src'))
+
+os.environ.setdefault('POSTGRES_DSN', 'sqlite:///{path}?timeout=30'.format(
+    path=Path(tempfile.mkdtemp(prefix='auth-bench-')) / 'bench.sqlite3',
+))
+os.environ.setdefault('LIMITER_STORAGE', 'memory://')
+
+import fakeredis  # noqa: E402
+from sqlalchemy.dialects.postgresql import UUID  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+
+from apps import redis  # noqa: E402
+
+redis.redis_client = fakeredis.FakeRedis()
+
+from apps.db import db  # noqa: E402
+from apps.limiter import rate_limiter  # noqa: E402
+from apps.security import user_datastore as postgres  # noqa: E402
+from core.config import CONFIG  # noqa: E402
+from core.enums import AuthRoles  # noqa: E402
+from manage import create_app  # noqa: E402
+from models.session import Session  # noqa: E402
+
+USER_EMAIL = 'bench@mail.com'
+USER_PASSWORD = 'benchpassword'
+
+Request = Tuple[str, str, dict]
+
+# В SQLite нет типа UUID: ID хранятся строкой, а преобразование туда и обратно делает сам тип PostgreSQL
+sqlite3.register_adapter(uuid.UUID, str)
+
+
+@compiles(UUID, 'sqlite')
+def compile_uuid(type_: UUID, compiler, **kwargs) -> str:
+    """Тип столбца для UUID из PostgreSQL при создании таблиц в SQLite.
+
+    Args:
+        type_: Тип столбца
+        compiler: Компилятор типов SQLite
+        kwargs: Параметры компиляции
+
+    Returns:
+        str: Строковый тип SQLite
+    """
+    return 'CHAR(36)'
+
+
+def prepare(app, history_size: int) -> Dict[str, Request]:
+    """Наполнение базы данных и подготовка запросов к ручкам.
+
+    Args:
+        app: Flask
+        history_size: Количество входов в истории пользователя
+
+    Returns:
+        Dict[str, Request]: Метод, адрес и параметры запроса по названию сценария
+    """
+    db.create_all()
+    user = postgres.create_user(email=USER_EMAIL, password=USER_PASSWORD)
+    for role in AuthRoles:
+        postgres.add_role_to_user(user, postgres.find_or_create_role(role.value))
+    postgres.commit()
+    postgres.db.session.execute(Session.__table__.insert(), [
+        {
+            'pk': uuid.uuid4(),
+            'event_date': datetime.utcnow(),
+            'user_pk': user.pk,
+            'user_agent': 'bench',
+            'user_device_type': 'other',
+        }
+        for _ in range(history_size)
+    ])
+    postgres.commit()
+
+    prefix = CONFIG.flask.url_prefix
+    credentials = {'email': USER_EMAIL, 'password': USER_PASSWORD}
+    tokens = app.test_client().post(f'{prefix}/sessions', json=credentials).get_json()
+    access = {'Authorization': 'Bearer {token}'.format(token=tokens['access_token'])}
+    refresh = {'Authorization': 'Bearer {token}'.format(token=tokens['refresh_token'])}
+    return {
+        'login': ('post', f'{prefix}/sessions', {'json': credentials}),
+        'refresh': ('put', f'{prefix}/sessions', {'headers': refresh}),
+        'profile': ('get', f'{prefix}/users', {'headers': access}),
+        'history': ('get', f'{prefix}/sessions?page_size=20', {'headers': access}),
+        'roles': ('get', f'{prefix}/roles', {}),
+    }
+
+
+def measure(app, request: Request, total: int, concurrency: int, warmup: int) -> dict:
+    """Выполнение запросов к ручке в несколько потоков.
+
+    Args:
+        app: Flask
+        request: Метод, адрес и параметры запроса
+        total: Общее количество запросов
+        concurrency: Количество потоков
+        warmup: Количество запросов для прогрева
+
+    Returns:
+        dict: Задержки в миллисекундах, RPS и количество ошибок
+    """
+    method, url, kwargs = request
+    latencies: List[float] = []
+    errors: List[int] = []
+    lock = threading.Lock()
+
+    def call(client) -> Tuple[float, int]:
+        started = time.perf_counter()
+        response = getattr(client, method)(url, **kwargs)
+        return time.perf_counter() - started, response.status_code
+
+    def worker(count: int):
+        client = app.test_client()
+        results = [call(client) for _ in range(count)]
+        with lock:
+            latencies.extend(latency for latency, _ in results)
+            errors.extend(status for _, status in results if status >= 400)
+
+    warmup_client = app.test_client()
+    for _ in range(warmup):
+        call(warmup_client)
+
+    shares = [total // concurrency + (index < total % concurrency) for index in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(share,)) for share in shares if share]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': round(len(latencies) / elapsed, 2),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'p50_ms': round(quantiles[49] * 1000, 3),
+        'p95_ms': round(quantiles[94] * 1000, 3),
+        'p99_ms': round(quantiles[98] * 1000, 3),
+    }
+
+
+def current_commit() -> Optional[str]:
+    """Коммит, на котором запущен бенчмарк.
+
+    Returns:
+        Optional[str]: Хэш коммита или None, если он недоступен
+    """
+    result = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=False,
+    )
+    return result.stdout.strip() or None
+
+
+def compare(report: dict, baseline: dict, write: Callable[[str], object]):
+    """Вывод изменений относительно предыдущего отчета.
+
+    Args:
+        report: Текущий отчет
+        baseline: Предыдущий отчет
+        write: Функция вывода строки
+    """
+    write('{0:<10} {1:>12} {2:>12} {3:>12}'.format('endpoint', 'p50', 'p95', 'rps'))
+    for name, stats in report['endpoints'].items():
+        if not (previous := baseline['endpoints'].get(name)):
+            continue
+        changes = [
+            (stats[metric] - previous[metric]) / previous[metric] * 100 if previous[metric] else 0
+            for metric in ('p50_ms', 'p95_ms', 'rps')
+        ]
+        write('{0:<10} {1:>+11.1f}% {2:>+11.1f}% {3:>+11.1f}%'.format(name, *changes))
+
+
+def main():
+    """Запуск бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200, help='Количество запросов на ручку')
+    parser.add_argument('--concurrency', type=int, default=8, help='Количество параллельных клиентов')
+    parser.add_argument('--warmup', type=int, default=10, help='Количество запросов для прогрева')
+    parser.add_argument('--history', type=int, default=1000, help='Количество входов в истории пользователя')
+    parser.add_argument('--only', nargs='*', help='Названия сценариев для запуска')
+    parser.add_argument('--output', type=Path, help='Файл для сохранения отчета')
+    parser.add_argument('--baseline', type=Path, help='Отчет, с которым нужно сравнить результат')
+    args = parser.parse_args()
+
+    app = create_app()
+    rate_limiter.enabled = False
+    app.app_context().push()
+    requests = prepare(app, args.history)
+
+    report = {
+        'commit': current_commit(),
+        'python': platform.python_version(),
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'endpoints': {
+            name: measure(app, request, args.requests, args.concurrency, args.warmup)
+            for name, request in requests.items()
+            if not args.only or name in args.only
+        },
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(output)
+    sys.stdout.write(output + '\n')
+    if args.baseline:
+        compare(report, json.loads(args.baseline.read_text()), lambda line: sys.stderr.write(line + '\n'))
+
+
+if __name__ == '__main__':
+    main()
@@ -12,4 +12,5 @@ ROLE_NAME = 'testrole'
 pytest_plugins = [
     'tests.src.fixtures.fixture_base',
     'tests.src.fixtures.fixture_data',
+    'tests.src.fixtures.fixture_oauth',
 ]
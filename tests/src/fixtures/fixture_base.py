@@ -2,6 +2,8 @@ import pytest
 
 from manage import create_app
 from apps.db import db
+from apps.limiter import rate_limiter
+from apps.redis import redis_client
 from sqlalchemy.orm.session import close_all_sessions
 
 
@@ -9,10 +11,12 @@ from sqlalchemy.orm.session import close_all_sessions
 def app():
     app = create_app()
     app.app_context().push()
+    rate_limiter.reset()
     db.create_all()
     yield app
     close_all_sessions()
     db.drop_all()
+    redis_client.flushdb()
 
 
 @pytest.fixture
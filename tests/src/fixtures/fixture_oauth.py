@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from apps.oauth import OAuthProvider
+from apps.security import social_accounts
+from core.config import GoogleConfig, YandexConfig
+from core.enums import OAuthProviders
+
+SOCIAL_ID = 'stub-user'
+DISCOVERY_PATH = '/.well-known/openid-configuration'
+
+
+class StubProviderHandler(BaseHTTPRequestHandler):
+    """Заглушка провайдера OAuth, которая выдает токен и данные пользователя с заданной задержкой."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.reply({'access_token': 'stub-token', 'user_id': SOCIAL_ID})
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        if self.path == DISCOVERY_PATH:
+            url = 'http://127.0.0.1:{port}/'.format(port=self.server.server_port)
+            self.reply({'token_endpoint': f'{url}token', 'userinfo_endpoint': f'{url}userinfo'})
+        else:
+            self.reply({'id': SOCIAL_ID, 'sub': SOCIAL_ID})
+
+    def reply(self, body: dict):
+        time.sleep(self.server.delay)
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def oauth_provider():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubProviderHandler)
+    server.delay = 0
+    server.paths = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def yandex(app, oauth_provider):
+    url = 'http://127.0.0.1:{port}/'.format(port=oauth_provider.server_port)
+    config = YandexConfig(
+        id='id',
+        secret='secret',
+        token_url=f'{url}token',
+        userinfo_url=f'{url}info',
+        read_timeout_sec=0.2,
+        retries=0,
+        breaker_failures=2,
+    )
+    provider = OAuthProvider(OAuthProviders.YANDEX.value, config)
+    app.config['OAUTH_PROVIDERS'].register(provider)
+    yield provider
+    social_accounts.delete(provider.name, SOCIAL_ID)
+
+
+@pytest.fixture
+def google(app, oauth_provider):
+    url = 'http://127.0.0.1:{port}'.format(port=oauth_provider.server_port)
+    config = GoogleConfig(id='id', secret='secret', discovery_url=f'{url}{DISCOVERY_PATH}', retries=0)
+    provider = OAuthProvider(OAuthProviders.GOOGLE.value, config)
+    app.config['OAUTH_PROVIDERS'].register(provider)
+    yield provider
+    social_accounts.delete(provider.name, SOCIAL_ID)
@@ -0,0 +1,27 @@
+from core.config import MainSettings
+
+
+def settings() -> MainSettings:
+    return MainSettings(_env_nested_delimiter='_')  # type: ignore[call-arg]
+
+
+def test_replicas_from_env(monkeypatch):
+    monkeypatch.setenv('POSTGRES_REPLICAS', 'replica-1, replica-2,')
+
+    assert settings().postgres.replicas == ['replica-1', 'replica-2']
+
+
+def test_replicas_default(monkeypatch):
+    monkeypatch.delenv('POSTGRES_REPLICAS', raising=False)
+
+    assert settings().postgres.replicas == []
+
+
+def test_keyring_from_env(monkeypatch):
+    monkeypatch.setenv('JWT_ALGORITHM', 'ES256')
+    monkeypatch.setenv('JWT_KEYS_DIR', '/run/secrets/jwt')
+    monkeypatch.setenv('JWT_ACTIVE_KID', '2026-10')
+
+    config = settings().jwt
+
+    assert (config.algorithm, config.keys_dir, config.active_kid) == ('ES256', '/run/secrets/jwt', '2026-10')
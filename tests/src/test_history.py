@@ -0,0 +1,69 @@
+import time
+import uuid
+from datetime import datetime
+
+from werkzeug.user_agent import UserAgent
+
+from apps.history import SessionWriter, write_sessions
+from models.session import Session
+
+
+def new_session(user_pk: uuid.UUID) -> Session:
+    return Session(
+        pk=uuid.uuid4(),
+        event_date=datetime.utcnow(),
+        user_pk=user_pk,
+        user_agent='pytest',
+        user_device_type=UserAgent('pytest'),
+    )
+
+
+def row(session: Session) -> dict:
+    return {column.key: getattr(session, column.key) for column in Session.__table__.columns}
+
+
+def stored_count() -> int:
+    return Session.query.count()
+
+
+def test_write_behind_flushes_batches(app, user):
+    writer = SessionWriter(batch_size=2, flush_interval=0.05, queue_size=10, retries=1)
+    writer.start(app)
+    for _ in range(3):
+        assert writer.put(new_session(user.pk))
+
+    deadline = time.monotonic() + 2
+    while stored_count() < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    writer.stop()
+
+    assert stored_count() == 3
+    assert not writer.enabled
+
+
+def test_stop_flushes_queue(app, user):
+    writer = SessionWriter(batch_size=100, flush_interval=0.05, queue_size=10, retries=1)
+    writer.start(app)
+    for _ in range(5):
+        writer.put(new_session(user.pk))
+
+    writer.stop()
+
+    assert stored_count() == 5
+    assert writer.queue.empty()
+
+
+def test_full_queue_is_rejected(app, user):
+    writer = SessionWriter(batch_size=10, flush_interval=1, queue_size=1, retries=1)
+
+    accepted = [writer.put(new_session(user.pk)) for _ in range(2)]
+
+    assert accepted == [True, False]
+
+
+def test_failed_batch_is_written_row_by_row(app, user):
+    good, orphan = new_session(user.pk), new_session(uuid.uuid4())
+
+    write_sessions(app, [row(good), row(orphan)], retries=2)
+
+    assert [session.pk for session in Session.query] == [good.pk]
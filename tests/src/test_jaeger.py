@@ -0,0 +1,92 @@
+import random
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.sdk.trace.sampling import Decision, ParentBased
+from opentelemetry.trace import Status, StatusCode
+
+from apps.jaeger import RecordingRatioSampler, TailSamplingProcessor, create_sampler
+from core.config import JaegerConfig
+
+SLOW_MS = 50
+TRACES = 10000
+
+
+@pytest.fixture
+def exporter():
+    return InMemorySpanExporter()
+
+
+def tracer(exporter: InMemorySpanExporter, ratio: float):
+    provider = TracerProvider(sampler=ParentBased(root=RecordingRatioSampler(ratio)))
+    provider.add_span_processor(TailSamplingProcessor(SimpleSpanProcessor(exporter), slow_ms=SLOW_MS, errors=True))
+    return provider.get_tracer(__name__)
+
+
+def finish(span, duration_ms: float = 0):
+    span.end(end_time=span.start_time + int(duration_ms * 1000000))
+
+
+def exported(exporter: InMemorySpanExporter) -> list:
+    return [span.name for span in exporter.get_finished_spans()]
+
+
+@pytest.mark.parametrize('ratio', [0, 0.25, 1])
+def test_recording_ratio_sampler(ratio):
+    sampler = RecordingRatioSampler(ratio)
+    generator = random.Random(0)
+    trace_ids = [generator.getrandbits(128) for _ in range(TRACES)]
+
+    decisions = [sampler.should_sample(None, trace_id, 'request').decision for trace_id in trace_ids]
+
+    sampled = decisions.count(Decision.RECORD_AND_SAMPLE)
+    assert sampled + decisions.count(Decision.RECORD_ONLY) == TRACES
+    assert sampled == pytest.approx(ratio * TRACES, abs=TRACES * 0.02)
+
+
+@pytest.mark.parametrize('tail_slow_ms, tail_errors, description', [
+    (0, False, 'TraceIdRatioBased'),
+    (SLOW_MS, False, 'RecordingRatioSampler'),
+    (0, True, 'RecordingRatioSampler'),
+])
+def test_create_sampler(tail_slow_ms, tail_errors, description):
+    config = JaegerConfig(sample_ratio=0.5, tail_slow_ms=tail_slow_ms, tail_errors=tail_errors)
+
+    sampler = create_sampler(config)
+
+    assert description in sampler.get_description()
+
+
+def test_tail_keeps_errors_and_slow_spans(exporter):
+    spans = tracer(exporter, ratio=0)
+    finish(spans.start_span('fast'))
+    finish(spans.start_span('slow'), duration_ms=SLOW_MS)
+    failed = spans.start_span('failed')
+    failed.set_status(Status(StatusCode.ERROR))
+    finish(failed)
+
+    assert exported(exporter) == ['slow', 'failed']
+    assert all(span.context.trace_flags.sampled for span in exporter.get_finished_spans())
+
+
+def test_tail_skips_children_of_unsampled_traces(exporter):
+    spans = tracer(exporter, ratio=0)
+
+    with spans.start_as_current_span('root') as root:
+        with spans.start_as_current_span('child') as child:
+            child.set_status(Status(StatusCode.ERROR))
+        root.set_status(Status(StatusCode.ERROR))
+
+    assert not child.is_recording()
+    assert exported(exporter) == ['root']
+
+
+def test_sampled_spans_are_exported(exporter):
+    spans = tracer(exporter, ratio=1)
+
+    with spans.start_as_current_span('root'):
+        finish(spans.start_span('child'))
+
+    assert exported(exporter) == ['child', 'root']
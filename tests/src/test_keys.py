@@ -0,0 +1,99 @@
+import json
+from http import HTTPStatus
+
+import jwt as pyjwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.serialization import Encoding, NoEncryption, PrivateFormat
+from jwt.exceptions import InvalidSignatureError
+
+from apps import jwt
+from apps.keys import KeyRing, keyring
+from core.config import CONFIG
+from tests.conftest import USER_PASSWORD
+
+ALGORITHM = 'ES256'
+
+
+def write_key(keys_dir, kid: str):
+    key = ec.generate_private_key(ec.SECP256R1())
+    (keys_dir / f'{kid}.pem').write_bytes(key.private_bytes(Encoding.PEM, PrivateFormat.PKCS8, NoEncryption()))
+
+
+def load_keyring(keys_dir, active_kid: str) -> KeyRing:
+    ring = KeyRing(ALGORITHM, str(keys_dir), active_kid)
+    ring.load(CONFIG.flask.secret_key)
+    return ring
+
+
+def sign(ring: KeyRing, claims: dict) -> str:
+    return pyjwt.encode(claims, ring.signing_key, algorithm=ALGORITHM, headers=ring.headers)
+
+
+def verify(ring: KeyRing, token: str) -> dict:
+    key = ring.verifying_key(pyjwt.get_unverified_header(token).get('kid'))
+    return pyjwt.decode(token, key, algorithms=[ALGORITHM])
+
+
+def test_sign_with_kid(tmp_path):
+    write_key(tmp_path, 'first')
+    ring = load_keyring(tmp_path, 'first')
+
+    token = sign(ring, {'sub': 'user'})
+
+    assert pyjwt.get_unverified_header(token)['kid'] == 'first'
+    assert verify(ring, token) == {'sub': 'user'}
+    assert [key['kid'] for key in json.loads(ring.jwks)['keys']] == ['first']
+
+
+def test_rotation_signs_with_active_key(tmp_path):
+    write_key(tmp_path, 'first')
+    old_token = sign(load_keyring(tmp_path, 'first'), {'sub': 'old'})
+    write_key(tmp_path, 'second')
+    ring = load_keyring(tmp_path, 'second')
+
+    new_token = sign(ring, {'sub': 'new'})
+
+    assert pyjwt.get_unverified_header(new_token)['kid'] == 'second'
+    assert verify(ring, old_token) == {'sub': 'old'}
+    assert verify(ring, new_token) == {'sub': 'new'}
+    assert sorted(key['kid'] for key in json.loads(ring.jwks)['keys']) == ['first', 'second']
+
+
+def test_unknown_kid_is_rejected(tmp_path):
+    write_key(tmp_path, 'first')
+    ring = load_keyring(tmp_path, 'first')
+
+    with pytest.raises(InvalidSignatureError):
+        ring.verifying_key('removed')
+
+
+def test_missing_active_key(tmp_path):
+    write_key(tmp_path, 'first')
+
+    with pytest.raises(ValueError, match='missing'):
+        load_keyring(tmp_path, 'missing')
+
+
+def test_token_with_unknown_kid_is_rejected(app, client, user, tmp_path, monkeypatch):
+    active_dir, removed_dir = tmp_path / 'active', tmp_path / 'removed'
+    for keys_dir, kid in ((active_dir, 'first'), (removed_dir, 'removed')):
+        keys_dir.mkdir()
+        write_key(keys_dir, kid)
+    monkeypatch.setattr(keyring, 'algorithm', ALGORITHM)
+    monkeypatch.setattr(keyring, 'keys_dir', str(active_dir))
+    monkeypatch.setattr(keyring, 'active_kid', 'first')
+    monkeypatch.setitem(app.config, 'JWT_ALGORITHM', ALGORITHM)
+    monkeypatch.setitem(app.config, 'JWT_DECODE_ALGORITHMS', [ALGORITHM])
+    jwt.load_keys()
+    body = {'email': user.email, 'password': USER_PASSWORD}
+    token = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).get_json()['access_token']
+    claims = pyjwt.decode(token, options={'verify_signature': False})
+    forged = sign(load_keyring(removed_dir, 'removed'), claims)
+
+    signed = client.get(f'{CONFIG.flask.url_prefix}/users', headers={'Authorization': f'Bearer {token}'})
+    unknown = client.get(f'{CONFIG.flask.url_prefix}/users', headers={'Authorization': f'Bearer {forged}'})
+
+    assert pyjwt.get_unverified_header(token)['kid'] == 'first'
+    assert signed.status_code == HTTPStatus.OK
+    assert unknown.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
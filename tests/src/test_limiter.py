@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+import pytest
+from limits import parse
+from limits.storage import storage_from_string
+
+from apps import limiter
+from apps.limiter import SlidingWindowCounterRateLimiter
+from core.config import CONFIG
+
+# Начало окна в одну минуту
+WINDOW_START = 60 * 1000
+
+
+@pytest.fixture
+def strategy(app):
+    storage = storage_from_string('redis://{host}:{port}'.format(host=CONFIG.redis.host, port=CONFIG.redis.port))
+    return SlidingWindowCounterRateLimiter(storage)
+
+
+def at(monkeypatch, timestamp: float):
+    monkeypatch.setattr(limiter.time, 'time', lambda: timestamp)
+
+
+def test_sliding_window_counter_limit(strategy, monkeypatch):
+    limit = parse('3/minute')
+    at(monkeypatch, WINDOW_START + 10)
+
+    hits = [strategy.hit(limit, 'client') for _ in range(4)]
+
+    assert hits == [True, True, True, False]
+    assert not strategy.test(limit, 'client')
+    assert strategy.hit(limit, 'other-client')
+
+
+def test_sliding_window_counter_test_does_not_count(strategy, monkeypatch):
+    limit = parse('2/minute')
+    at(monkeypatch, WINDOW_START + 10)
+
+    checks = [strategy.test(limit, 'client') for _ in range(3)]
+
+    assert all(checks)
+    assert strategy.get_window_stats(limit, 'client').remaining == 2
+
+
+def test_sliding_window_counter_weights_previous_window(strategy, monkeypatch):
+    limit = parse('10/minute')
+    at(monkeypatch, WINDOW_START + 30)
+    for _ in range(6):
+        strategy.hit(limit, 'client')
+
+    # Прошла половина следующего окна, поэтому из предыдущего учитывается половина запросов
+    at(monkeypatch, WINDOW_START + 90)
+    stats = strategy.get_window_stats(limit, 'client')
+    hits = [strategy.hit(limit, 'client') for _ in range(8)]
+
+    assert stats.remaining == 7
+    assert stats.reset_time == WINDOW_START + 120
+    assert hits == [True] * 7 + [False]
+
+
+def test_limit_is_keyed_by_forwarded_address(client):
+    url = f'{CONFIG.flask.url_prefix}/users'
+    amount = parse(CONFIG.limiter.default).amount
+
+    statuses = [client.get(url, headers={'X-Forwarded-For': '10.0.0.1'}).status_code for _ in range(amount + 1)]
+    other = client.get(url, headers={'X-Forwarded-For': '10.0.0.2'})
+
+    assert statuses[-1] == HTTPStatus.TOO_MANY_REQUESTS
+    assert other.status_code == HTTPStatus.UNAUTHORIZED
@@ -0,0 +1,64 @@
+import threading
+import time
+from http import HTTPStatus
+
+from prometheus_client import REGISTRY
+
+from apps.hashing import PasswordHasher
+from apps.metrics import observe_redis_pool
+from apps.redis import redis_pool
+from core.config import CONFIG
+from tests.conftest import USER_PASSWORD
+
+
+def test_metrics(client, user):
+    body = {'email': user.email, 'password': USER_PASSWORD}
+    client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body)
+
+    response = client.get('/metrics')
+    metrics = response.get_data(as_text=True)
+
+    assert response.status_code == HTTPStatus.OK
+    assert f'endpoint="{CONFIG.flask.url_prefix}/sessions"' in metrics
+    assert 'password_hash_duration_seconds_count{operation="verify"}' in metrics
+    assert 'token_mint_duration_seconds_count' in metrics
+    assert 'password_hash_queue_depth' in metrics
+    assert 'redis_pool_connections{state="available"}' in metrics
+
+
+def test_password_hasher_gauges(app):
+    hasher = PasswordHasher(workers=1)
+    release = threading.Event()
+
+    def verify():
+        with app.app_context():
+            hasher._run('verify', release.wait, 2)
+
+    threads = [threading.Thread(target=verify) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 2
+    while hasher.in_flight < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    in_flight = REGISTRY.get_sample_value('password_hash_in_flight')
+    queued = REGISTRY.get_sample_value('password_hash_queue_depth')
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert (in_flight, queued) == (2, 1)
+    assert REGISTRY.get_sample_value('password_hash_in_flight') == 0
+    assert REGISTRY.get_sample_value('password_hash_queue_depth') == 0
+
+
+def test_redis_pool_gauges(app):
+    connection = redis_pool.get_connection('PING')
+    try:
+        observe_redis_pool()
+        in_use = REGISTRY.get_sample_value('redis_pool_connections', {'state': 'in_use'})
+        available = REGISTRY.get_sample_value('redis_pool_connections', {'state': 'available'})
+    finally:
+        redis_pool.release(connection)
+
+    assert in_use >= 1
+    assert in_use + available == CONFIG.redis.max_connections
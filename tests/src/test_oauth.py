@@ -0,0 +1,54 @@
+from http import HTTPStatus
+
+from flask_jwt_extended import decode_token
+
+from core.config import CONFIG
+from core.enums import OAuthProviders
+from models.user import SocialAccount
+from tests.src.fixtures.fixture_oauth import DISCOVERY_PATH, SOCIAL_ID
+
+
+def test_oauth_callback(client, yandex):
+    response = client.get(f'{CONFIG.flask.url_prefix}/sessions/{OAuthProviders.YANDEX.value}?code=code')
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.get_json().get('access_token')
+    assert SocialAccount.query.filter_by(social_id=SOCIAL_ID).one()
+
+
+def test_oauth_callback_twice(client, yandex):
+    url = f'{CONFIG.flask.url_prefix}/sessions/{OAuthProviders.YANDEX.value}?code=code'
+
+    responses = [client.get(url) for _ in range(2)]
+
+    assert [response.status_code for response in responses] == [HTTPStatus.CREATED] * 2
+    assert len({decode_token(response.get_json()['access_token'])['sub'] for response in responses}) == 1
+    assert SocialAccount.query.filter_by(social_id=SOCIAL_ID).count() == 1
+
+
+def test_oauth_discovery(client, google, oauth_provider):
+    url = f'{CONFIG.flask.url_prefix}/sessions/{OAuthProviders.GOOGLE.value}?code=code'
+
+    responses = [client.get(url) for _ in range(2)]
+
+    assert [response.status_code for response in responses] == [HTTPStatus.CREATED] * 2
+    assert oauth_provider.paths.count(DISCOVERY_PATH) == 1
+    assert SocialAccount.query.filter_by(social_id=SOCIAL_ID, social_name=google.name).one()
+
+
+def test_oauth_unknown_provider(client):
+    response = client.get(f'{CONFIG.flask.url_prefix}/sessions/unknown?code=code')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_oauth_slow_provider(client, yandex, oauth_provider):
+    oauth_provider.delay = 0.5
+    url = f'{CONFIG.flask.url_prefix}/sessions/{OAuthProviders.YANDEX.value}?code=code'
+
+    responses = [client.get(url) for _ in range(2)]
+    oauth_provider.delay = 0
+
+    assert [response.status_code for response in responses] == [HTTPStatus.SERVICE_UNAVAILABLE] * 2
+    assert not yandex.transport.breaker.closed
+    assert client.get(url).status_code == HTTPStatus.SERVICE_UNAVAILABLE
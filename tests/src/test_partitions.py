@@ -0,0 +1,83 @@
+import uuid
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import text
+
+from apps.db import db
+from models.session import PartitionManager
+
+
+@pytest.fixture
+def connection(app, user):
+    # Таблица из модели не партицирована, поэтому она пересоздается так же, как в миграциях
+    with db.engine.begin() as connection:
+        connection.execute(text('DROP TABLE sessions'))
+        connection.execute(text('''
+            CREATE TABLE sessions (
+                pk uuid, event_date timestamp NOT NULL, user_pk uuid NOT NULL REFERENCES users (pk) ON DELETE CASCADE,
+                user_agent varchar, user_device_type text, PRIMARY KEY (pk, event_date, user_device_type)
+            ) PARTITION BY LIST (user_device_type)
+        '''))
+        for device_type in PartitionManager.device_types:
+            connection.execute(text(f'''
+                CREATE TABLE "sessions_{device_type}" PARTITION OF sessions FOR VALUES IN ('{device_type}')
+                PARTITION BY RANGE (event_date)
+            '''))
+            connection.execute(text(
+                f'CREATE TABLE "sessions_{device_type}_default" PARTITION OF "sessions_{device_type}" DEFAULT',
+            ))
+    with db.engine.begin() as connection:
+        yield connection
+    # Отсоединенные партиции ссылаются на пользователей и не удаляются вместе с таблицей сессий
+    with db.engine.begin() as connection:
+        detached = connection.execute(text(r"""
+            SELECT relname FROM pg_class
+            WHERE relkind = 'r' AND NOT relispartition AND relname LIKE 'sessions\_%'
+        """)).scalars().all()
+        for name in detached:
+            connection.execute(text(f'DROP TABLE "{name}"'))
+
+
+def insert_session(connection, user, event_date: datetime):
+    connection.execute(
+        text("INSERT INTO sessions VALUES (:pk, :event_date, :user_pk, 'pytest', 'pc')"),
+        {'pk': uuid.uuid4(), 'event_date': event_date, 'user_pk': user.pk},
+    )
+
+
+def test_create_partitions(connection):
+    manager = PartitionManager(connection)
+
+    created = manager.create(date(2026, 1, 15), date(2026, 2, 1))
+    repeated = manager.create(date(2026, 1, 1), date(2026, 2, 1))
+
+    assert created == repeated
+    assert len(created) == 2 * len(PartitionManager.device_types)
+    assert manager.partitions('sessions_pc') == ['sessions_pc_default', 'sessions_pc_y2026m01', 'sessions_pc_y2026m02']
+
+
+def test_create_partition_moves_default_rows(connection, user):
+    manager = PartitionManager(connection)
+    insert_session(connection, user, datetime(2026, 3, 10))
+    insert_session(connection, user, datetime(2026, 4, 10))
+
+    manager.create(date(2026, 3, 1), date(2026, 3, 1))
+
+    count = 'SELECT count(*) FROM "{0}"'
+    assert connection.execute(text(count.format('sessions_pc_y2026m03'))).scalar() == 1
+    assert connection.execute(text(count.format('sessions_pc_default'))).scalar() == 1
+    assert connection.execute(text(count.format('sessions'))).scalar() == 2
+
+
+@pytest.mark.parametrize('detach_only', [False, True])
+def test_expire_partitions(connection, detach_only):
+    manager = PartitionManager(connection)
+    manager.create(date(2026, 1, 1), date(2026, 2, 1))
+
+    expired = manager.expire(date(2026, 2, 1), detach_only=detach_only)
+
+    assert sorted(expired) == sorted(f'sessions_{device}_y2026m01' for device in PartitionManager.device_types)
+    assert manager.partitions('sessions_pc') == ['sessions_pc_default', 'sessions_pc_y2026m02']
+    kept = connection.execute(text("SELECT to_regclass('sessions_pc_y2026m01')")).scalar()
+    assert (kept is not None) == detach_only
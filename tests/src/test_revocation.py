@@ -0,0 +1,83 @@
+import time
+import uuid
+
+import pytest
+
+from apps.redis import redis_client
+from apps.revocation import BloomFilter, RevocationFilter, RotatingBloomFilter
+
+
+@pytest.fixture
+def revocation(app):
+    generations = RotatingBloomFilter(capacity=1000, error_rate=0.001, ttl=60)
+    return RevocationFilter(redis_client, stream=f'revoked:{uuid.uuid4()}', generations=generations, block_ms=50)
+
+
+def wait_for(condition, timeout: float = 2) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_bloom_filter_members():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    members = [str(uuid.uuid4()) for _ in range(1000)]
+    for member in members:
+        bloom.add(member)
+
+    false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(1000))
+
+    assert all(member in bloom for member in members)
+    assert false_positives < 50
+
+
+def test_rotating_filter_keeps_members_for_one_period():
+    generations = RotatingBloomFilter(capacity=100, error_rate=0.001, ttl=60)
+    generations.add('jti')
+
+    generations._rotated_at -= 60
+    kept = 'jti' in generations
+    generations._rotated_at -= 60
+    expired = 'jti' in generations
+
+    assert kept
+    assert not expired
+
+
+def test_revoke(revocation):
+    revocation.revoke('revoked-jti')
+
+    assert revocation.is_revoked('revoked-jti')
+    assert revocation.find_revoked('revoked-jti', 'active-jti') == {'revoked-jti'}
+    assert redis_client.xlen(revocation.stream) == 1
+
+
+def test_synced_filter_skips_redis_for_absent_tokens(revocation):
+    redis_client.set('unknown-jti', '')
+    revocation._synced_at = time.monotonic()
+
+    assert not revocation.is_revoked('unknown-jti')
+
+
+def test_unsynced_filter_checks_redis(revocation):
+    redis_client.set('unknown-jti', '')
+
+    assert revocation.is_revoked('unknown-jti')
+
+
+def test_possible_match_is_confirmed_in_redis(revocation):
+    revocation.generations.add('false-positive-jti')
+    revocation._synced_at = time.monotonic()
+
+    assert not revocation.is_revoked('false-positive-jti')
+
+
+def test_stream_reader_fills_filter(revocation):
+    revocation.start()
+    redis_client.xadd(revocation.stream, {'jti': 'other-process-jti'})
+
+    assert wait_for(lambda: 'other-process-jti' in revocation.generations)
+    assert wait_for(lambda: revocation.synced)
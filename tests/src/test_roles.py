@@ -1,8 +1,27 @@
+import uuid
 from http import HTTPStatus
 
+import pytest
+from sqlalchemy import select
+
+from apps.db import db
+from apps.security import user_datastore
 from apps.utils import generate_random_string
 from core.config import CONFIG
+from core.enums import AuthRoles
 from models.role import Role
+from models.user import User
+
+
+@pytest.fixture
+def role_member(user, new_role):
+    user_datastore.add_role_to_user(user, new_role)
+    user_datastore.commit()
+    return user
+
+
+def token_generation(user_pk: uuid.UUID) -> int:
+    return db.session.execute(select(User.token_generation).where(User.pk == user_pk)).scalar()
 
 
 def test_create_role(client, admin_tokens):
@@ -24,6 +43,44 @@ def test_list_roles(client, user, admin):
     assert len(response.get_json()) == len(roles)
 
 
+def test_list_roles_after_create(client, admin_tokens):
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+    body = {'name': generate_random_string(8)}
+    client.get(f'{CONFIG.flask.url_prefix}/roles')
+
+    client.post(f'{CONFIG.flask.url_prefix}/roles', headers=headers, json=body)
+    response = client.get(f'{CONFIG.flask.url_prefix}/roles')
+
+    assert body['name'] in [role['name'] for role in response.get_json()]
+
+
+def test_list_roles_not_modified(client, user, admin):
+    etag = client.get(f'{CONFIG.flask.url_prefix}/roles').headers['ETag']
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/roles', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert 'public' in response.headers['Cache-Control']
+
+
+def test_list_roles_invalid_page_not_modified(client, user, admin):
+    etag = client.get(f'{CONFIG.flask.url_prefix}/roles').headers['ETag']
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/roles?page_size=1000', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_retrieve_role_not_modified(client, new_role):
+    etag = client.get(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}').headers['ETag']
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}', headers={'If-None-Match': etag})
+    missing = client.get(f'{CONFIG.flask.url_prefix}/roles/missingrole', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert missing.status_code == HTTPStatus.NOT_FOUND
+
+
 def test_retrieve_role(client, new_role):
     role_name = new_role.name
 
@@ -50,3 +107,69 @@ def test_delete_role(client, admin_tokens, new_role):
 
     assert response.status_code == HTTPStatus.NO_CONTENT
     assert not Role.query.filter_by(name=new_role.name).first()
+
+
+@pytest.mark.parametrize('field, revoked', [('name', True), ('description', False)])
+def test_update_role_revokes_tokens_on_rename(client, admin_tokens, role_member, new_role, field, revoked):
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+    generation = token_generation(role_member.pk)
+
+    client.put(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}', headers=headers, json={field: 'renamedrole'})
+
+    assert token_generation(role_member.pk) == generation + revoked
+
+
+def test_delete_role_revokes_tokens(client, admin_tokens, role_member, new_role):
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+    generation = token_generation(role_member.pk)
+
+    client.delete(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}', headers=headers)
+
+    assert token_generation(role_member.pk) == generation + 1
+
+
+def test_assign_role_to_users(client, admin_tokens, user, new_role):
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+    missing_pk = str(uuid.uuid4())
+    body = {'users': [str(user.pk), missing_pk]}
+
+    response = client.post(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}/users', headers=headers, json=body)
+    repeated = client.post(f'{CONFIG.flask.url_prefix}/roles/{new_role.name}/users', headers=headers, json=body)
+
+    assert response.status_code == HTTPStatus.OK
+    assert [result['status'] for result in response.get_json()['users']] == ['added', 'not_found']
+    assert [result['status'] for result in repeated.get_json()['users']] == ['unchanged', 'not_found']
+
+
+def test_remove_role_from_users(client, admin_tokens, user_subscriber):
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+    body = {'users': [str(user_subscriber.pk)]}
+    url = f'{CONFIG.flask.url_prefix}/roles/{AuthRoles.SUBSCRIBER.value}/users'
+
+    response = client.delete(url, headers=headers, json=body)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_json()['users'] == [{'user_pk': str(user_subscriber.pk), 'status': 'removed'}]
+
+
+def test_assign_role_keeps_tokens(client, admin_tokens, user, new_role):
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+    url = f'{CONFIG.flask.url_prefix}/roles/{new_role.name}/users'
+    generation = token_generation(user.pk)
+
+    client.post(url, headers=headers, json={'users': [str(user.pk)]})
+
+    assert token_generation(user.pk) == generation
+
+
+def test_list_roles_cursor(client, user, admin):
+    url = f'{CONFIG.flask.url_prefix}/roles?page_size=1'
+
+    first_page = client.get(url)
+    second_page = client.get('{url}&cursor={cursor}'.format(url=url, cursor=first_page.headers['X-Next-Cursor']))
+    previous_page = client.get('{url}&cursor={cursor}'.format(url=url, cursor=second_page.headers['X-Prev-Cursor']))
+
+    names = [page.get_json()[0]['name'] for page in (first_page, second_page)]
+    assert names == sorted(names)
+    assert names[0] != names[1]
+    assert previous_page.get_json() == first_page.get_json()
@@ -1,5 +1,6 @@
 from http import HTTPStatus
 
+from apps.limiter import rate_limiter
 from core.config import CONFIG
 from models.session import Session
 from tests.conftest import USER_PASSWORD
@@ -41,3 +42,42 @@ def test_logout(client, user_tokens):
 
     assert response.status_code == HTTPStatus.NO_CONTENT
     assert client.get(f'{CONFIG.flask.url_prefix}/users', headers=headers).status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_auth_history_cursor(client, user, user_tokens, monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'enabled', False)
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+    for _ in range(2):
+        client.post(f'{CONFIG.flask.url_prefix}/sessions', json={'email': user.email, 'password': USER_PASSWORD})
+
+    first_page = client.get(f'{CONFIG.flask.url_prefix}/sessions?page_size=2&count=true', headers=headers)
+    cursor = first_page.headers['X-Next-Cursor']
+    second_page = client.get(f'{CONFIG.flask.url_prefix}/sessions?page_size=2&cursor={cursor}', headers=headers)
+    cursor = second_page.headers['X-Prev-Cursor']
+    previous_page = client.get(f'{CONFIG.flask.url_prefix}/sessions?page_size=2&cursor={cursor}', headers=headers)
+
+    assert first_page.headers['X-Total-Count'] == '3'
+    assert 'rel="next"' in first_page.headers['Link']
+    assert len(first_page.get_json()) == 2
+    assert len(second_page.get_json()) == 1
+    assert 'X-Next-Cursor' not in second_page.headers
+    assert previous_page.get_json() == first_page.get_json()
+
+
+def test_auth_history_forged_cursor(client, user_tokens):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/sessions?cursor=W10.AAAA', headers=headers)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_logout_everywhere(client, user_tokens):
+    access = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+    refresh = {'Authorization': 'Bearer {token}'.format(token=user_tokens['refresh_token'])}
+
+    response = client.delete(f'{CONFIG.flask.url_prefix}/sessions?everywhere=true', headers=access)
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert client.get(f'{CONFIG.flask.url_prefix}/users', headers=access).status_code == HTTPStatus.UNAUTHORIZED
+    assert client.put(f'{CONFIG.flask.url_prefix}/sessions', headers=refresh).status_code == HTTPStatus.UNAUTHORIZED
@@ -3,6 +3,7 @@ from http import HTTPStatus
 from api.schemas import RoleSchema
 from core.config import CONFIG
 from core.enums import AuthRoles
+from tests.conftest import USER_ID, USER_PASSWORD
 
 
 def test_add_subscription(client, user, admin_tokens):
@@ -14,6 +15,15 @@ def test_add_subscription(client, user, admin_tokens):
     assert AuthRoles.SUBSCRIBER.value.title() in list(map(str, user.roles))
 
 
+def test_add_subscription_twice(client, user_subscriber, admin_tokens):
+    headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+
+    response = client.post(f'{CONFIG.flask.url_prefix}/users/{user_subscriber.pk}/subscribe', headers=headers)
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert list(map(str, user_subscriber.roles)).count(AuthRoles.SUBSCRIBER.value.title()) == 1
+
+
 def test_check_subscription(client, user_subscriber, admin_tokens):
     headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
 
@@ -30,3 +40,19 @@ def test_delete_subscription(client, user_subscriber, admin_tokens):
 
     assert response.status_code == HTTPStatus.NO_CONTENT
     assert AuthRoles.SUBSCRIBER.value.title() not in list(map(str, user_subscriber.roles))
+
+
+def test_subscription_revokes_tokens(client, user, user_tokens, admin_tokens):
+    user_headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+    admin_headers = {'Authorization': 'Bearer {token}'.format(token=admin_tokens['access_token'])}
+    client.get(f'{CONFIG.flask.url_prefix}/users', headers=user_headers)
+
+    client.post(f'{CONFIG.flask.url_prefix}/users/{USER_ID}/subscribe', headers=admin_headers)
+    response = client.get(f'{CONFIG.flask.url_prefix}/users', headers=user_headers)
+    body = {'email': user.email, 'password': USER_PASSWORD}
+    tokens = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=body).get_json()
+    new_headers = {'Authorization': 'Bearer {token}'.format(token=tokens['access_token'])}
+    new_response = client.get(f'{CONFIG.flask.url_prefix}/users', headers=new_headers)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert AuthRoles.SUBSCRIBER.value.title() in new_response.get_json()['roles']
@@ -0,0 +1,68 @@
+from http import HTTPStatus
+
+from flask_jwt_extended import decode_token
+from limits import parse
+
+from apps.jwt import token_minter
+from core.config import CONFIG
+from tests.conftest import USER_PASSWORD
+
+
+def test_jwks(client):
+    response = client.get('/.well-known/jwks.json')
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'keys' in response.get_json()
+    assert response.headers['Cache-Control']
+
+
+def test_jwks_not_modified(client):
+    etag = client.get('/.well-known/jwks.json').headers['ETag']
+
+    response = client.get('/.well-known/jwks.json', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_introspect(client, user_tokens):
+    body = {'tokens': [user_tokens['access_token'], user_tokens['refresh_token'], 'invalid']}
+
+    response = client.post(f'{CONFIG.flask.url_prefix}/tokens/introspect', json=body)
+
+    access, refresh, invalid = response.get_json()['tokens']
+    assert response.status_code == HTTPStatus.OK
+    assert access['active'] and access['type'] == 'access' and access['user_id']
+    assert refresh['active'] and refresh['type'] == 'refresh'
+    assert invalid == {'active': False}
+
+
+def test_introspect_revoked(client, user_tokens):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+    client.delete(f'{CONFIG.flask.url_prefix}/sessions', headers=headers)
+
+    response = client.post(f'{CONFIG.flask.url_prefix}/tokens/introspect', json={'token': user_tokens['access_token']})
+
+    assert response.get_json()['tokens'] == [{'active': False}]
+
+
+def test_introspect_has_own_limit(client):
+    amount = parse(CONFIG.limiter.default).amount
+    url = f'{CONFIG.flask.url_prefix}/tokens/introspect'
+
+    statuses = {client.post(url, json={'token': 'invalid'}).status_code for _ in range(amount + 1)}
+
+    assert statuses == {HTTPStatus.OK}
+
+
+def test_compact_refresh(client, user, monkeypatch):
+    monkeypatch.setattr(token_minter, 'compact_refresh', True)
+    credentials = {'email': user.email, 'password': USER_PASSWORD}
+    tokens = client.post(f'{CONFIG.flask.url_prefix}/sessions', json=credentials).get_json()
+
+    headers = {'Authorization': 'Bearer {token}'.format(token=tokens['refresh_token'])}
+    response = client.put(f'{CONFIG.flask.url_prefix}/sessions', headers=headers)
+
+    assert decode_token(tokens['access_token'])['roles']
+    assert 'roles' not in decode_token(tokens['refresh_token'])
+    assert response.status_code == HTTPStatus.OK
+    assert decode_token(response.get_json()['access_token'])['roles']
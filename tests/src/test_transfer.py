@@ -0,0 +1,81 @@
+import json
+import uuid
+
+import pytest
+
+from apps.db import db
+from apps.transfer import UserExporter, UserImporter
+from core.config import CONFIG
+from core.enums import AuthRoles
+from models.role import roles_users
+from models.user import User
+from tests.conftest import ROLE_NAME, USER_EMAIL
+
+HEADER = 'pk,email,password,active,roles\n'
+
+
+def importer(batch_size: int = 1) -> UserImporter:
+    return UserImporter(batch_size, CONFIG.transfer.roles_separator, lambda *args: None)
+
+
+def exporter() -> UserExporter:
+    return UserExporter(1, CONFIG.transfer.roles_separator, lambda *args: None)
+
+
+def user_roles(email: str) -> set:
+    return {role.name for role in User.query.filter_by(email=email).one().roles}
+
+
+def test_import_assigns_roles_to_new_users_only(app, user, new_role, tmp_path):
+    path = tmp_path / 'users.csv'
+    lines = [f',new@mail.com,hash,true,{ROLE_NAME}|{AuthRoles.USER.value}\n', f',{USER_EMAIL},hash,,{ROLE_NAME}\n']
+    path.write_text(HEADER + ''.join(lines))
+
+    imported = importer(batch_size=10).run(path, 'csv', tmp_path / 'users.checkpoint')
+
+    assert imported == 1
+    assert user_roles('new@mail.com') == {ROLE_NAME, AuthRoles.USER.value}
+    assert user_roles(USER_EMAIL) == {AuthRoles.USER.value}
+
+
+def test_import_unknown_role(app, tmp_path):
+    path = tmp_path / 'users.ndjson'
+    path.write_text(json.dumps({'email': 'new@mail.com', 'password': 'hash', 'roles': ['missingrole']}))
+
+    with pytest.raises(ValueError, match='missingrole'):
+        importer().run(path, 'ndjson', tmp_path / 'users.checkpoint')
+
+    assert User.query.count() == 0
+
+
+def test_import_resume_from_checkpoint(app, new_role, tmp_path):
+    emails = ['first@mail.com', 'second@mail.com', 'third@mail.com']
+    lines = [f'{uuid.uuid4()},{email},hash,true,{ROLE_NAME}\n' for email in emails]
+    path = tmp_path / 'users.csv'
+    path.write_text(HEADER + ''.join(lines))
+    checkpoint = tmp_path / 'users.checkpoint'
+    checkpoint.write_text(json.dumps({'offset': len(HEADER) + len(lines[0]), 'imported': 1}))
+
+    imported = importer().run(path, 'csv', checkpoint)
+
+    assert imported == 3
+    assert not checkpoint.exists()
+    assert {user.email for user in User.query} == set(emails[1:])
+
+
+@pytest.mark.parametrize('file_format', ['csv', 'ndjson'])
+def test_export_import_round_trip(app, user, admin, file_format, tmp_path):
+    exported = tmp_path / f'exported.{file_format}'
+    with exported.open('w', encoding='utf-8', newline='') as stream:
+        assert exporter().run(stream, file_format) == 2
+    db.session.execute(roles_users.delete())
+    User.query.delete()
+    db.session.commit()
+
+    imported = importer().run(exported, file_format, tmp_path / 'users.checkpoint')
+    reexported = tmp_path / f'reexported.{file_format}'
+    with reexported.open('w', encoding='utf-8', newline='') as stream:
+        exporter().run(stream, file_format)
+
+    assert imported == 2
+    assert reexported.read_text() == exported.read_text()
@@ -29,6 +29,16 @@ def test_personal_information(client, user_tokens):
     assert response.get_json()['email'] == USER_EMAIL
 
 
+def test_personal_information_not_modified(client, user_tokens):
+    headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
+    etag = client.get(f'{CONFIG.flask.url_prefix}/users', headers=headers).headers['ETag']
+
+    response = client.get(f'{CONFIG.flask.url_prefix}/users', headers={**headers, 'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert 'private' in response.headers['Cache-Control']
+
+
 def test_change_password(client, user_tokens):
     headers = {'Authorization': 'Bearer {token}'.format(token=user_tokens['access_token'])}
     body = {'old_password': USER_PASSWORD, 'new_password': generate_random_string(8)}